@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Seeded generators of KO instances, written in the text formats read by the read_input functions of the projects.
+The projects build their in-memory test instances from the same generators.
+usage: generators.py reviewer out.txt [--customers 100] [--products 100] [--density 10] [--seed 0]
+       generators.py tracking out.txt [--objects 50] [--frames 20] [--jitter 10] [--seed 0]
+"""
+import argparse
+import random
+from typing import List, Tuple
+
+
+def reviewer_instance(c_size, p_size, density, seed=0) -> Tuple[List[Tuple[int, int, List[int]]], List[int]]:
+    """
+    net-flows / net-flows-v2 instance: every customer lists density products, product lower bounds are at most a
+    third of the number of customers listing the product, so most instances are feasible
+    :return: lb, ub and products (from 0) of every customer and the lower bound of every product
+    """
+    rnd = random.Random(seed)
+    listed = [0] * p_size
+    customers = []
+    for _ in range(c_size):
+        products = rnd.sample(range(p_size), min(density, p_size))
+        for p in products:
+            listed[p] += 1
+        lb = rnd.randint(0, len(products) // 2)
+        ub = rnd.randint(lb, len(products))
+        customers.append((lb, ub, products))
+    return customers, [rnd.randint(0, count // 3) for count in listed]
+
+
+def tracking_instance(num_objects, num_frames, jitter=10, seed=0) -> List[List[Tuple[int, int]]]:
+    """
+    obj-tracking instance: objects on a 1000 x 1000 area moving by at most jitter per frame, shuffled in every frame
+    :return: positions of the objects in every frame
+    """
+    rnd = random.Random(seed)
+    positions = [(rnd.randint(0, 1000), rnd.randint(0, 1000)) for _ in range(num_objects)]
+    frames = []
+    for _ in range(num_frames):
+        positions = positions[:]
+        rnd.shuffle(positions)
+        positions = [(x + rnd.randint(-jitter, jitter), y + rnd.randint(-jitter, jitter)) for x, y in positions]
+        frames.append(positions)
+    return frames
+
+
+def write_reviewer_instance(path, c_size, p_size, density, seed=0):
+    """
+    Writes reviewer_instance in the net-flows format
+    """
+    customers, product_lbs = reviewer_instance(c_size, p_size, density, seed)
+    with open(path, 'w') as f:
+        f.write(f'{c_size} {p_size}\n')
+        for lb, ub, products in customers:
+            f.write(' '.join([str(x) for x in [lb, ub] + [p + 1 for p in products]]) + '\n')
+        f.write(' '.join([str(lb) for lb in product_lbs]))
+
+
+def write_tracking_instance(path, num_objects, num_frames, jitter=10, seed=0):
+    """
+    Writes tracking_instance in the obj-tracking format
+    """
+    with open(path, 'w') as f:
+        f.write(f'{num_objects} {num_frames}')
+        for positions in tracking_instance(num_objects, num_frames, jitter, seed):
+            f.write('\n' + ' '.join([f'{x} {y}' for x, y in positions]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest='kind', required=True)
+    reviewer = subparsers.add_parser('reviewer')
+    reviewer.add_argument('out_path')
+    reviewer.add_argument('--customers', type=int, default=100)
+    reviewer.add_argument('--products', type=int, default=100)
+    reviewer.add_argument('--density', type=int, default=10, help='number of products listed by every customer')
+    reviewer.add_argument('--seed', type=int, default=0)
+    tracking = subparsers.add_parser('tracking')
+    tracking.add_argument('out_path')
+    tracking.add_argument('--objects', type=int, default=50)
+    tracking.add_argument('--frames', type=int, default=20)
+    tracking.add_argument('--jitter', type=int, default=10)
+    tracking.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.kind == 'reviewer':
+        write_reviewer_instance(args.out_path, args.customers, args.products, args.density, args.seed)
+    else:
+        write_tracking_instance(args.out_path, args.objects, args.frames, args.jitter, args.seed)
+
+
+if __name__ == '__main__':
+    main()
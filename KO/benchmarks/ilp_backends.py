@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Compares the MILP backends of milpmodel on the bundled instances of the KO ILP programs. Every (program, instance,
+backend) case runs the program in its own process, the wall time and the objective of its output are reported together
+with whether the objective matches the bundled solution. The results go to stdout and optionally to CSV / JSON files
+tagged with the current git commit.
+usage: ilp_backends.py [--programs ilp-1 practical-test sp-cc-0 tsp] [--backends gurobi highs] [--repeat 1]
+                       [--timeout 300] [--csv out.csv] [--json out.json]
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+KO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# program directory, directory of the instances and of the solutions
+PROGRAMS = {
+    'ilp-1': ('ilp-1', 'ilp-1/hw1_public_instances/instances', 'ilp-1/hw1_public_instances/solutions'),
+    'practical-test': ('practical-test', 'practical-test/data/public/instances',
+                       'practical-test/data/public/solutions'),
+    'sp-cc-0': ('semester-project/sp-cc-0', 'semester-project/sp-cc-0/cocontest-optimal-public/instances',
+                'semester-project/sp-cc-0/cocontest-optimal-public/solutions'),
+    'tsp': ('tsp', 'tsp/data/hw4_public_instances/public/instances',
+            'tsp/data/hw4_public_instances/public/solutions'),
+}
+BACKENDS = ('gurobi', 'highs')
+FIELDS = ('commit', 'program', 'instance', 'backend', 'repeat', 'status', 'seconds', 'objective', 'expected',
+          'matches')
+
+
+def objective(program, in_path, out_path) -> float:
+    """
+    Objective of an output file, the first line for all programs but tsp, whose tours are priced by its distances
+    """
+    with open(out_path) as f:
+        text = f.read()
+    if program != 'tsp':
+        return float(text.split('\n')[0])
+    sys.path.insert(0, os.path.join(KO_DIR, 'tsp'))
+    import heuristics
+    import main as tsp
+    distances = tsp.compute_distances(tsp.read_input(in_path))
+    return heuristics.tour_cost(distances, np.array([0] + [int(x) for x in text.split()]))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=KO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_case(program, in_path, out_path, backend, timeout=None):
+    """
+    :return: wall time in seconds
+    """
+    directory = os.path.join(KO_DIR, PROGRAMS[program][0])
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, 'main.py', in_path, out_path, '--solver', backend], cwd=directory,
+                         capture_output=True, text=True, timeout=timeout)
+    seconds = time.perf_counter() - start
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'program failed')
+    return seconds
+
+
+def run(args):
+    commit = _git_commit()
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        out_path = os.path.join(directory, 'out.txt')
+        for program in args.programs:
+            _, instances, solutions = PROGRAMS[program]
+            for in_path in sorted(glob.glob(os.path.join(KO_DIR, instances, '*.txt'))):
+                name = os.path.basename(in_path)
+                solution = os.path.join(KO_DIR, solutions, name)
+                expected = objective(program, in_path, solution) if os.path.exists(solution) else None
+                for backend in args.backends:
+                    for repeat in range(args.repeat):
+                        row = dict(commit=commit, program=program, instance=name, backend=backend, repeat=repeat,
+                                   status='ok', expected=expected)
+                        try:
+                            row['seconds'] = run_case(program, in_path, out_path, backend, args.timeout)
+                            row['objective'] = objective(program, in_path, out_path)
+                            if expected is not None:
+                                row['matches'] = abs(row['objective'] - expected) < 1e-6
+                        except subprocess.TimeoutExpired:
+                            row['status'] = 'timeout'
+                        except RuntimeError as e:
+                            row['status'] = f'error: {e}'
+                        rows.append(row)
+                        _print_row(row)
+    return rows
+
+
+def _print_row(row):
+    seconds = f'{row["seconds"]:>8.3f}' if 'seconds' in row else f'{"-":>8}'
+    obj = f'{row["objective"]:>12g}' if 'objective' in row else f'{"-":>12}'
+    print(f'{row["program"]:>14} {row["instance"]:>16} {row["backend"]:>7} {seconds} {obj} '
+          f'{str(row.get("matches", "-")):>7}  {row["status"]}', flush=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--programs', nargs='+', choices=tuple(PROGRAMS.keys()), default=list(PROGRAMS.keys()))
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=300, help='seconds per case')
+    parser.add_argument('--csv', default=None)
+    parser.add_argument('--json', default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(f'{"program":>14} {"instance":>16} {"backend":>7} {"seconds":>8} {"objective":>12} {"matches":>7}  status')
+    rows = run(args)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the flow engines of net-flows, net-flows-v2 and obj-tracking on generated instances.
+Every (instance, engine) case runs in its own process, which times the parse, build, solve and write phases
+separately and reports its peak RSS. The results go to stdout and optionally to CSV / JSON files tagged with the
+current git commit, so runs of different engines and commits can be compared.
+usage: run.py [--targets net-flows net-flows-v2 obj-tracking] [--sizes 50 100] [--density 10] [--frames 10]
+              [--engines dinic ssp] [--repeat 1] [--timeout 300] [--csv out.csv] [--json out.json]
+"""
+import argparse
+import csv
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import generators
+
+KO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ('net-flows', 'net-flows-v2', 'obj-tracking')
+# module of the ENGINES of every target, the max-flow engines are shared through KO/common
+ENGINE_MODULES = {'net-flows': 'maxflow_engines', 'net-flows-v2': 'maxflow_engines', 'obj-tracking': 'engines'}
+FIELDS = ('commit', 'target', 'instance', 'size', 'engine', 'backend', 'repeat', 'status', 'parse', 'build', 'solve',
+          'write', 'total', 'peak_rss_kb')
+
+
+def _variants(target):
+    sys.path.insert(0, os.path.join(KO_DIR, 'common'))
+    sys.path.insert(0, os.path.join(KO_DIR, target))
+    engines = list(importlib.import_module(ENGINE_MODULES[target]).ENGINES.keys())
+    if target == 'net-flows':
+        return [(engine, '') for engine in engines]
+    if target == 'net-flows-v2':
+        return [(engine, backend) for backend in ('object', 'csr') for engine in engines]
+    assignment_engines = list(importlib.import_module('assignment').ASSIGNMENT_ENGINES.keys())
+    return [(engine, '') for engine in ['cycle-cancelling'] + engines + assignment_engines]
+
+
+def _run_case(target, in_path, out_path, engine, backend):
+    """
+    Solves one instance in this process
+    :return: seconds spent in every phase
+    """
+    sys.path.insert(0, os.path.join(KO_DIR, target))
+    times = {'parse': 0.0, 'build': 0.0, 'solve': 0.0, 'write': 0.0}
+    last = [time.perf_counter()]
+
+    def lap(phase):
+        now = time.perf_counter()
+        times[phase] += now - last[0]
+        last[0] = now
+
+    if target == 'net-flows':
+        main, graph = importlib.import_module('main'), importlib.import_module('graph')
+        last[0] = time.perf_counter()
+        data = main.read_input(in_path)
+        lap('parse')
+        g = graph.build_graph_from_input(data)
+        lap('build')
+        reviews = main.solve(g, engine)
+        lap('solve')
+        main.save_output(out_path, reviews)
+    elif target == 'net-flows-v2':
+        mainv2 = importlib.import_module('mainv2')
+        last[0] = time.perf_counter()
+        data = mainv2.read_input(in_path)
+        lap('parse')
+        g = mainv2.build_graph(data, backend)
+        lap('build')
+        reviews = mainv2.solve(g, data, engine)
+        lap('solve')
+        mainv2.save_output(out_path, reviews)
+    else:
+        inoutdata, mincostflow = importlib.import_module('inoutdata'), importlib.import_module('mincostflow')
+        assignment_engines = importlib.import_module('assignment').ASSIGNMENT_ENGINES
+        last[0] = time.perf_counter()
+        data = inoutdata.read_input(in_path)
+        lap('parse')
+        out_data = []
+        for frame in range(data.num_frames - 1):
+            if engine in assignment_engines:
+                distance_matrix = data.get_distance_matrix(frame, frame + 1)
+                lap('build')
+                out_data.append([int(j) + 1 for j in assignment_engines[engine](distance_matrix)])
+            else:
+                g = mincostflow.build_mincost_graph(data, frame, frame + 1)
+                lap('build')
+                mincostflow.minimize_cost(g, engine)
+                out_data.append(mincostflow.get_obj_mapping(g))
+            lap('solve')
+        inoutdata.save_output(out_data, out_path)
+    lap('write')
+    return times
+
+
+def _worker(args):
+    if args.worker == 'variants':
+        print(json.dumps(_variants(args.target)))
+        return
+    times = _run_case(args.target, args.in_path, args.out_path, args.engine, args.backend)
+    times['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps(times))
+
+
+def _spawn(*worker_args, timeout=None):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker'] + [str(a) for a in worker_args],
+                         capture_output=True, text=True, timeout=timeout)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'worker failed')
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=KO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def generate_instances(target, sizes, density, frames, seed, directory):
+    """
+    :return: (size, path) of a generated instance of every size
+    """
+    instances = []
+    for size in sizes:
+        if target == 'obj-tracking':
+            path = os.path.join(directory, f'tracking_{size}x{frames}_s{seed}.txt')
+            generators.write_tracking_instance(path, size, frames, seed=seed + size)
+        else:
+            path = os.path.join(directory, f'reviewer_{size}_d{density}_s{seed}.txt')
+            generators.write_reviewer_instance(path, size, size, density, seed + size)
+        instances.append((size, path))
+    return instances
+
+
+def run(args):
+    commit = _git_commit()
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        directory = args.keep or directory
+        os.makedirs(directory, exist_ok=True)
+        out_path = os.path.join(directory, 'out.txt')
+        for target in args.targets:
+            variants = [v for v in _spawn('variants', target, '', '', '', '')
+                        if not args.engines or v[0] in args.engines]
+            for size, in_path in generate_instances(target, args.sizes, args.density, args.frames, args.seed,
+                                                    directory):
+                for engine, backend in variants:
+                    for repeat in range(args.repeat):
+                        row = dict(commit=commit, target=target, instance=os.path.basename(in_path), size=size,
+                                   engine=engine, backend=backend, repeat=repeat, status='ok')
+                        try:
+                            result = _spawn('case', target, in_path, out_path, engine, backend, timeout=args.timeout)
+                            row.update(result)
+                            row['total'] = sum([result[p] for p in ('parse', 'build', 'solve', 'write')])
+                        except subprocess.TimeoutExpired:
+                            row['status'] = 'timeout'
+                        except RuntimeError as e:
+                            row['status'] = f'error: {e}'
+                        rows.append(row)
+                        _print_row(row)
+    return rows
+
+
+def _print_row(row):
+    def fmt(key):
+        return f'{row[key]:>8.3f}' if key in row else f'{"-":>8}'
+    print(f'{row["target"]:>13} {row["size"]:>6} {row["engine"]:>17} {row["backend"]:>7} ' +
+          ' '.join([fmt(p) for p in ('parse', 'build', 'solve', 'write', 'total')]) +
+          f' {row.get("peak_rss_kb", "-"):>9}  {row["status"]}', flush=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 100],
+                        help='customers and products of reviewer instances, objects of tracking instances')
+    parser.add_argument('--density', type=int, default=10, help='products listed by every customer')
+    parser.add_argument('--frames', type=int, default=10, help='frames of tracking instances')
+    parser.add_argument('--engines', nargs='+', default=None, help='run only these engines')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=300, help='seconds per case')
+    parser.add_argument('--keep', default=None, help='directory for the generated instances instead of a temporary one')
+    parser.add_argument('--csv', default=None)
+    parser.add_argument('--json', default=None)
+    parser.add_argument('--worker', choices=('variants', 'case'), help=argparse.SUPPRESS)
+    parser.add_argument('target', nargs='?', help=argparse.SUPPRESS)
+    parser.add_argument('in_path', nargs='?', help=argparse.SUPPRESS)
+    parser.add_argument('out_path', nargs='?', help=argparse.SUPPRESS)
+    parser.add_argument('engine', nargs='?', help=argparse.SUPPRESS)
+    parser.add_argument('backend', nargs='?', default='', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        _worker(args)
+        return
+    print(f'{"target":>13} {"size":>6} {"engine":>17} {"backend":>7} {"parse":>8} {"build":>8} {"solve":>8} '
+          f'{"write":>8} {"total":>8} {"rss_kb":>9}  status')
+    rows = run(args)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Bulk reader of the reviewer assignment input. The whole file is tokenised by numpy in one pass into flat int arrays,
+no per customer objects are created.
+"""
+from typing import Dict
+
+import numpy as np
+
+import instancecache
+
+
+class InputArrays:
+    """
+    Customers are numbered from 1 and products from 0 as in InputData, customer c_id lists the products
+    products[offsets[c_id - 1]:offsets[c_id]].
+    """
+
+    def __init__(self, c_lb: np.ndarray, c_ub: np.ndarray, offsets: np.ndarray, products: np.ndarray,
+                 p_lb: np.ndarray):
+        self.c_size = c_lb.shape[0]
+        self.p_size = p_lb.shape[0]
+        self.c_lb = c_lb
+        self.c_ub = c_ub
+        self.offsets = offsets
+        self.products = products
+        self.p_lb = p_lb
+        self.p_ub = np.bincount(products, minlength=self.p_size)
+
+    def products_of(self, c_id) -> np.ndarray:
+        return self.products[self.offsets[c_id - 1]:self.offsets[c_id]]
+
+
+def read_input_arrays(path, use_cache=False) -> InputArrays:
+    """
+    :param use_cache: keep the arrays in the instancecache, later runs on the same file memory-map them
+    """
+    if use_cache:
+        return InputArrays(**instancecache.load(path, 'reviewer-1', _parse_arrays))
+    return InputArrays(**_parse_arrays(path))
+
+
+def _parse_arrays(path) -> Dict[str, np.ndarray]:
+    with open(path, 'rb') as f:
+        raw = f.read()
+    tokens = np.fromstring(raw, dtype=np.int64, sep=' ')
+
+    # number of tokens on every non-empty line
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    space = buf <= ord(' ')
+    token_start = ~space
+    token_start[1:] &= space[:-1]
+    newline = buf == ord('\n')
+    line = np.cumsum(newline) - newline
+    tokens_per_line = np.bincount(line[token_start])
+    tokens_per_line = tokens_per_line[tokens_per_line > 0]
+    if tokens_per_line.sum() != tokens.shape[0]:
+        raise ValueError(f'{path} contains tokens that are not integers')
+
+    c_size, p_size = int(tokens[0]), int(tokens[1])
+    if tokens_per_line.shape[0] != c_size + 2 or tokens_per_line[-1] != p_size:
+        raise ValueError(f'{path} does not contain {c_size} customer lines and {p_size} product lower bounds')
+    line_starts = np.concatenate(([0], np.cumsum(tokens_per_line)))
+    c_starts = line_starts[1:c_size + 1]
+    num_products = tokens_per_line[1:c_size + 1] - 2
+    offsets = np.concatenate(([0], np.cumsum(num_products)))
+    product_idx = np.repeat(c_starts + 2 - offsets[:-1], num_products) + np.arange(offsets[-1])
+    return dict(c_lb=tokens[c_starts], c_ub=tokens[c_starts + 1], offsets=offsets, products=tokens[product_idx] - 1,
+                p_lb=tokens[line_starts[c_size + 1]:])
@@ -0,0 +1,49 @@
+"""
+Cache of parsed instances as .npy arrays keyed by the hash of the input file. Later loads memory-map the arrays
+instead of parsing the text again, an edited input file hashes to a new key, so stale entries are never used.
+The cache lives in $KO_CACHE_DIR, ~/.cache/ko by default.
+"""
+import hashlib
+import os
+import shutil
+from typing import Callable, Dict
+
+import numpy as np
+
+
+def file_key(path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_dir(path, kind) -> str:
+    root = os.environ.get('KO_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'ko'))
+    return os.path.join(root, kind, file_key(path))
+
+
+def load(path, kind, parse: Callable[[str], Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    :param kind: name and version of the array layout, e.g. 'reviewer-1', entries of different kinds never mix
+    :param parse: reads the text input into named arrays, only called on a cache miss
+    :return: the arrays, memory-mapped read-only on a cache hit
+    """
+    directory = cache_dir(path, kind)
+    if os.path.exists(os.path.join(directory, 'complete')):
+        return {name[:-len('.npy')]: np.load(os.path.join(directory, name), mmap_mode='r')
+                for name in os.listdir(directory) if name.endswith('.npy')}
+
+    arrays = parse(path)
+    # written under a temporary name first, so concurrent runs never see a partial entry
+    tmp = f'{directory}.tmp{os.getpid()}'
+    os.makedirs(tmp, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp, f'{name}.npy'), np.asarray(values))
+    open(os.path.join(tmp, 'complete'), 'w').close()
+    try:
+        os.rename(tmp, directory)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return arrays
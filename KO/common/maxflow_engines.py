@@ -0,0 +1,208 @@
+"""
+Max-flow engines working on a residual network in CSR layout. All engines take the same arguments:
+num_nodes, source, sink and the python lists start, head, cap, rev, flow where arcs of node v are
+start[v]..start[v + 1] - 1, rev[a] is the twin of arc a and cap[a] - flow[a] is its residual capacity.
+The flow list is updated in place, flow[rev[a]] == -flow[a] holds before and after every call.
+"""
+from collections import deque
+from typing import List
+
+
+def shortest_path_bfs(num_nodes, source, start, head, cap, flow) -> List[int]:
+    """
+    :return: arc used to reach every node, -1 for unreached nodes
+    """
+    parent = [-1] * num_nodes
+    q = deque()
+    q.append(source)
+    while len(q) > 0:
+        v = q.popleft()
+        for a in range(start[v], start[v + 1]):
+            w = head[a]
+            if parent[w] < 0 and w != source and cap[a] > flow[a]:
+                parent[w] = a
+                q.append(w)
+    return parent
+
+
+def edmonds_karp(num_nodes, source, sink, start, head, cap, rev, flow):
+    while True:
+        parent = shortest_path_bfs(num_nodes, source, start, head, cap, flow)
+        if parent[sink] < 0:
+            break
+        df = None
+        v = sink
+        while v != source:
+            a = parent[v]
+            df = cap[a] - flow[a] if df is None else min(df, cap[a] - flow[a])
+            v = head[rev[a]]
+        v = sink
+        while v != source:
+            a = parent[v]
+            flow[a] += df
+            flow[rev[a]] -= df
+            v = head[rev[a]]
+
+
+def _levels_bfs(num_nodes, source, sink, start, head, cap, flow) -> List[int]:
+    level = [-1] * num_nodes
+    level[source] = 0
+    q = deque()
+    q.append(source)
+    while len(q) > 0:
+        v = q.popleft()
+        if v == sink:
+            break
+        for a in range(start[v], start[v + 1]):
+            w = head[a]
+            if level[w] < 0 and cap[a] > flow[a]:
+                level[w] = level[v] + 1
+                q.append(w)
+    return level
+
+
+def _blocking_flow(source, sink, start, head, cap, rev, flow, level):
+    current = start[:-1]
+    path = []
+    v = source
+    while True:
+        if v == sink:
+            df = min([cap[a] - flow[a] for a in path])
+            for a in path:
+                flow[a] += df
+                flow[rev[a]] -= df
+            # continue from the tail of the first arc saturated by the augmentation
+            for i, a in enumerate(path):
+                if cap[a] == flow[a]:
+                    del path[i:]
+                    break
+            v = head[path[-1]] if path else source
+            continue
+
+        a, end = current[v], start[v + 1]
+        while a < end and (cap[a] <= flow[a] or level[head[a]] != level[v] + 1):
+            a += 1
+        current[v] = a
+        if a < end:
+            path.append(a)
+            v = head[a]
+        elif v == source:
+            return
+        else:
+            level[v] = -1
+            a = path.pop()
+            v = head[rev[a]]
+            current[v] += 1
+
+
+def dinic(num_nodes, source, sink, start, head, cap, rev, flow):
+    while True:
+        level = _levels_bfs(num_nodes, source, sink, start, head, cap, flow)
+        if level[sink] < 0:
+            break
+        _blocking_flow(source, sink, start, head, cap, rev, flow, level)
+
+
+def _distance_labels(num_nodes, sink, start, head, cap, rev, flow) -> List[int]:
+    """
+    Exact distances to the sink in the residual network, nodes which can not reach the sink get num_nodes.
+    """
+    height = [num_nodes] * num_nodes
+    height[sink] = 0
+    q = deque()
+    q.append(sink)
+    while len(q) > 0:
+        w = q.popleft()
+        for b in range(start[w], start[w + 1]):
+            a = rev[b]
+            v = head[b]
+            if height[v] == num_nodes and cap[a] > flow[a]:
+                height[v] = height[w] + 1
+                q.append(v)
+    return height
+
+
+def push_relabel(num_nodes, source, sink, start, head, cap, rev, flow):
+    """
+    Highest-label push-relabel with the gap heuristic. Excess which can not reach the sink is pushed back to the
+    source in the same loop, so a valid flow (not just a preflow) is left in the flow list.
+    """
+    n = num_nodes
+    height = _distance_labels(n, sink, start, head, cap, rev, flow)
+    height[source] = n
+    count = [0] * (2 * n + 1)
+    for h in height:
+        count[h] += 1
+    excess = [0] * n
+    active: List[List[int]] = [[] for _ in range(2 * n + 1)]
+    current = start[:-1]
+
+    highest = 0
+    for a in range(start[source], start[source + 1]):
+        w = head[a]
+        df = cap[a] - flow[a]
+        if df <= 0:
+            continue
+        flow[a] += df
+        flow[rev[a]] -= df
+        if excess[w] == 0 and w != sink and w != source:
+            active[height[w]].append(w)
+            highest = max(highest, height[w])
+        excess[w] += df
+
+    while highest >= 0:
+        if not active[highest]:
+            highest -= 1
+            continue
+        v = active[highest].pop()
+        if excess[v] == 0 or height[v] != highest:
+            continue
+
+        while excess[v] > 0:
+            a = current[v]
+            if a == start[v + 1]:
+                # relabel
+                old_height = height[v]
+                new_height = 2 * n
+                for b in range(start[v], start[v + 1]):
+                    if cap[b] > flow[b]:
+                        new_height = min(new_height, height[head[b]] + 1)
+                count[old_height] -= 1
+                height[v] = new_height
+                count[new_height] += 1
+                current[v] = start[v]
+                if count[old_height] == 0 and old_height < n:
+                    # gap: nodes above old_height can not reach the sink anymore
+                    for u in range(n):
+                        if old_height < height[u] < n and u != source:
+                            count[height[u]] -= 1
+                            height[u] = n + 1
+                            count[n + 1] += 1
+                            current[u] = start[u]
+                            if excess[u] > 0 and u != v:
+                                active[n + 1].append(u)
+                    highest = max(highest, n + 1)
+                continue
+
+            w = head[a]
+            residual = cap[a] - flow[a]
+            if residual > 0 and height[v] == height[w] + 1:
+                df = min(excess[v], residual)
+                flow[a] += df
+                flow[rev[a]] -= df
+                excess[v] -= df
+                if excess[w] == 0 and w != sink and w != source:
+                    active[height[w]].append(w)
+                excess[w] += df
+                if df == residual:
+                    current[v] += 1
+            else:
+                current[v] += 1
+        highest = max(highest, height[v])
+
+
+ENGINES = {
+    'edmonds-karp': edmonds_karp,
+    'dinic': dinic,
+    'push-relabel': push_relabel,
+}
@@ -0,0 +1,306 @@
+"""
+Thin modelling layer of the KO ILP programs. Both backends follow the subset of the gurobipy API the programs use, so
+the same model code runs on Gurobi or on HiGHS through scipy.optimize.milp: addVar, addVars (with tupledict sum),
+addConstr, addConstrs, setObjective, quicksum, optimize with MIPSOL / MIPNODE callbacks, cbGetSolution, cbGetNodeRel,
+cbLazy, cbCut, Status, ObjVal and the x and Start of the variables. A solver package is only imported by its backend.
+HiGHS has no callbacks in scipy, its lazy constraints are added by solving again until the MIPSOL callback adds none,
+MIPNODE callbacks and MIP starts are not used there.
+"""
+import itertools
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# values of the gurobipy constants
+CONTINUOUS, INTEGER, BINARY = 'C', 'I', 'B'
+MINIMIZE, MAXIMIZE = 1, -1
+OPTIMAL, INFEASIBLE, UNBOUNDED, TIME_LIMIT, NUMERIC = 2, 3, 5, 9, 12
+# callback events, MIPNODE is only reported for node relaxations solved to optimality
+MIPSOL, MIPNODE = 'mipsol', 'mipnode'
+BACKENDS = ('gurobi', 'highs')
+
+
+def create_model(backend='gurobi', time_limit=None, verbose=True) -> 'Model':
+    """
+    :param time_limit: seconds, the best solution found so far is kept
+    """
+    if backend == 'gurobi':
+        return GurobiModel(time_limit, verbose)
+    if backend == 'highs':
+        return HighsModel(time_limit, verbose)
+    raise ValueError(f'Unknown MILP backend: {backend}')
+
+
+class Model:
+    def addConstrs(self, constrs: Iterable, name=''):
+        return [self.addConstr(c) for c in constrs]
+
+
+class GurobiModel(Model):
+    def __init__(self, time_limit=None, verbose=True):
+        import gurobipy
+        self._grb = gurobipy
+        self.model = gurobipy.Model()
+        if time_limit is not None:
+            self.model.Params.timeLimit = time_limit
+        if not verbose:
+            self.model.Params.outputFlag = 0
+
+    def addVar(self, lb=0.0, ub=float('inf'), obj=0.0, vtype=CONTINUOUS, name=''):
+        return self.model.addVar(lb=lb, ub=ub, obj=obj, vtype=vtype, name=name)
+
+    def addVars(self, *indices, lb=0.0, ub=float('inf'), obj=0.0, vtype=CONTINUOUS, name=''):
+        return self.model.addVars(*indices, lb=lb, ub=ub, obj=obj, vtype=vtype, name=name)
+
+    def addConstr(self, constr, name=''):
+        return self.model.addConstr(constr, name=name)
+
+    def addConstrs(self, constrs: Iterable, name=''):
+        return self.model.addConstrs(constrs, name=name)
+
+    def setObjective(self, expr, sense=MINIMIZE):
+        self.model.setObjective(expr, sense)
+
+    def quicksum(self, terms: Iterable):
+        return self._grb.quicksum(terms)
+
+    def optimize(self, callback=None):
+        if callback is None:
+            self.model.optimize()
+            return
+        grb = self._grb.GRB
+        self.model.Params.lazyConstraints = 1
+        # user cuts are stated on the original variables
+        self.model.Params.preCrush = 1
+
+        def on_event(_, where):
+            if where == grb.Callback.MIPSOL:
+                callback(self, MIPSOL)
+            elif where == grb.Callback.MIPNODE and self.model.cbGet(grb.Callback.MIPNODE_STATUS) == grb.OPTIMAL:
+                callback(self, MIPNODE)
+        self.model.optimize(on_event)
+
+    def cbGetSolution(self, variables):
+        return self.model.cbGetSolution(variables)
+
+    def cbGetNodeRel(self, variables):
+        return self.model.cbGetNodeRel(variables)
+
+    def cbLazy(self, constr):
+        self.model.cbLazy(constr)
+
+    def cbCut(self, constr):
+        self.model.cbCut(constr)
+
+    def display(self):
+        self.model.display()
+
+    @property
+    def Status(self):
+        return self.model.Status
+
+    @property
+    def ObjVal(self):
+        return self.model.ObjVal
+
+
+class LinExpr:
+    def __init__(self, coefs: Optional[Dict[int, float]] = None, constant=0.0):
+        self.coefs = {} if coefs is None else coefs
+        self.constant = constant
+
+    def copy(self) -> 'LinExpr':
+        return LinExpr(dict(self.coefs), self.constant)
+
+    def add(self, other, multiplier=1.0) -> 'LinExpr':
+        """
+        Adds multiplier * other in place
+        """
+        if isinstance(other, Var):
+            self.coefs[other.index] = self.coefs.get(other.index, 0.0) + multiplier
+        elif isinstance(other, LinExpr):
+            for index, coef in other.coefs.items():
+                self.coefs[index] = self.coefs.get(index, 0.0) + multiplier * coef
+            self.constant += multiplier * other.constant
+        else:
+            self.constant += multiplier * other
+        return self
+
+    def __add__(self, other):
+        return self.copy().add(other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self.copy().add(other, -1.0)
+
+    def __rsub__(self, other):
+        return LinExpr().add(other).add(self, -1.0)
+
+    def __neg__(self):
+        return LinExpr().add(self, -1.0)
+
+    def __mul__(self, other):
+        if isinstance(other, (Var, LinExpr)):
+            raise TypeError('only linear expressions are supported')
+        return LinExpr({index: coef * other for index, coef in self.coefs.items()}, self.constant * other)
+
+    __rmul__ = __mul__
+
+    def __le__(self, other):
+        return Constr(self - other, -np.inf, 0.0)
+
+    def __ge__(self, other):
+        return Constr(self - other, 0.0, np.inf)
+
+    def __eq__(self, other):
+        return Constr(self - other, 0.0, 0.0)
+
+    __hash__ = object.__hash__
+
+
+class Var(LinExpr):
+    """
+    Variable of a HighsModel, x is its value in the last solution
+    """
+
+    def __init__(self, index: int):
+        super().__init__({index: 1.0})
+        self.index = index
+        self.x = None
+        self.Start = None
+
+
+class Constr:
+    """
+    lb <= expr <= ub
+    """
+
+    def __init__(self, expr: LinExpr, lb, ub):
+        self.expr = expr
+        self.lb = lb - expr.constant
+        self.ub = ub - expr.constant
+
+
+class tupledict(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # variables by the fixed index values, for every combination of fixed index positions of sum
+        self._indices = {}
+
+    def sum(self, *pattern):
+        """
+        :param pattern: index values, '*' matches everything, sums all variables without a pattern. The keys are
+                        indexed on the first sum with a pattern, later added keys are not seen by it.
+        """
+        if not pattern:
+            return LinExpr({var.index: 1.0 for var in self.values()})
+        fixed = tuple([p != '*' for p in pattern])
+        if fixed not in self._indices:
+            index = {}
+            for key, var in self.items():
+                key = key if isinstance(key, tuple) else (key,)
+                index.setdefault(tuple([k for k, f in zip(key, fixed) if f]), []).append(var)
+            self._indices[fixed] = index
+        return LinExpr({var.index: 1.0 for var in self._indices[fixed].get(tuple([p for p in pattern if p != '*']),
+                                                                          [])})
+
+
+class HighsModel(Model):
+    def __init__(self, time_limit=None, verbose=True):
+        self.time_limit = time_limit
+        self.verbose = verbose
+        self.vars: List[Var] = []
+        self._lb, self._ub, self._obj, self._integral = [], [], [], []
+        self._rows, self._cols, self._vals, self._row_lb, self._row_ub = [], [], [], [], []
+        self._objective = LinExpr()
+        self._sense = MINIMIZE
+        self._lazy: List[Constr] = []
+        self._solution: Optional[np.ndarray] = None
+        self.Status = None
+        self.ObjVal = None
+
+    def addVar(self, lb=0.0, ub=float('inf'), obj=0.0, vtype=CONTINUOUS, name=''):
+        var = Var(len(self.vars))
+        self.vars.append(var)
+        self._lb.append(lb)
+        self._ub.append(min(ub, 1.0) if vtype == BINARY else ub)
+        self._obj.append(obj)
+        self._integral.append(vtype != CONTINUOUS)
+        return var
+
+    def addVars(self, *indices, lb=0.0, ub=float('inf'), obj=0.0, vtype=CONTINUOUS, name=''):
+        """
+        :param indices: numbers of values or lists of keys of every index, as in gurobipy
+        """
+        variables = tupledict()
+        for combination in itertools.product(*[range(i) if isinstance(i, int) else list(i) for i in indices]):
+            key = tuple([k for part in combination for k in (part if isinstance(part, tuple) else (part,))])
+            variables[key[0] if len(key) == 1 else key] = self.addVar(lb, ub, obj, vtype)
+        return variables
+
+    def addConstr(self, constr: Constr, name=''):
+        row = len(self._row_lb)
+        for index, coef in constr.expr.coefs.items():
+            self._rows.append(row)
+            self._cols.append(index)
+            self._vals.append(coef)
+        self._row_lb.append(constr.lb)
+        self._row_ub.append(constr.ub)
+        return constr
+
+    def setObjective(self, expr, sense=MINIMIZE):
+        self._objective = LinExpr().add(expr)
+        self._obj = [0.0] * len(self.vars)
+        self._sense = sense
+
+    def quicksum(self, terms: Iterable):
+        expr = LinExpr()
+        for term in terms:
+            expr.add(term)
+        return expr
+
+    def optimize(self, callback=None):
+        while True:
+            self._solve()
+            if callback is None or self._solution is None:
+                return
+            self._lazy = []
+            callback(self, MIPSOL)
+            if not self._lazy:
+                return
+            for constr in self._lazy:
+                self.addConstr(constr)
+
+    def _solve(self):
+        from scipy.optimize import Bounds, LinearConstraint, milp
+        from scipy.sparse import csr_matrix
+
+        num_vars = len(self.vars)
+        c = np.array(self._obj, dtype=np.float64)
+        np.add.at(c, list(self._objective.coefs.keys()), list(self._objective.coefs.values()))
+        constraints = []
+        if self._row_lb:
+            a = csr_matrix((self._vals, (self._rows, self._cols)), shape=(len(self._row_lb), num_vars))
+            constraints.append(LinearConstraint(a, self._row_lb, self._row_ub))
+        options = {'disp': self.verbose}
+        if self.time_limit is not None:
+            options['time_limit'] = self.time_limit
+        result = milp(self._sense * c, integrality=np.array(self._integral, dtype=np.int64),
+                      bounds=Bounds(self._lb, self._ub), constraints=constraints, options=options)
+
+        self.Status = {0: OPTIMAL, 1: TIME_LIMIT, 2: INFEASIBLE, 3: UNBOUNDED}.get(result.status, NUMERIC)
+        # integral values are only integral up to the tolerance of HiGHS
+        self._solution = None if result.x is None else np.where(self._integral, np.round(result.x), result.x)
+        if self._solution is not None:
+            self.ObjVal = float(c @ self._solution) + self._objective.constant
+            for var, value in zip(self.vars, self._solution.tolist()):
+                var.x = value
+
+    def cbGetSolution(self, variables):
+        if isinstance(variables, Var):
+            return float(self._solution[variables.index])
+        return self._solution[[var.index for var in variables]].tolist()
+
+    def cbLazy(self, constr: Constr):
+        self._lazy.append(constr)
@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
+import argparse
+import os
 import sys
-import gurobipy as g
-from gurobipy import tupledict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+import milpmodel  # noqa: E402
 
-def read_input():
-    assert len(sys.argv) == 3
-    input_file_path = sys.argv[1]
-    output_file_path = sys.argv[2]
-    return input_file_path, output_file_path
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input_file_path')
+    parser.add_argument('output_file_path')
+    parser.add_argument('--solver', choices=milpmodel.BACKENDS, default='gurobi', help='MILP backend')
+    return parser.parse_args()
 
 
 def read_file_to_list(path) -> list:
@@ -26,21 +30,22 @@ def write_to_file(opt_obj_val: int, opt_vals: list, path: str):
 
 
 if __name__ == '__main__':
-    inp_f, out_f = read_input()
+    args = parse_args()
+    inp_f, out_f = args.input_file_path, args.output_file_path
     demands = read_file_to_list(inp_f)
-    model = g.Model()
+    model = milpmodel.create_model(args.solver)
     num_hours = len(demands)
-    x: tupledict = model.addVars(num_hours, name='x', vtype=g.GRB.INTEGER)
-    z: tupledict = model.addVars(num_hours, name='z', vtype=g.GRB.INTEGER)
+    x = model.addVars(num_hours, name='x', vtype=milpmodel.INTEGER)
+    z = model.addVars(num_hours, name='z', vtype=milpmodel.INTEGER)
 
     for i in range(num_hours):
-        shifts_sum_i = g.quicksum([x[j % num_hours] for j in range(i - 7, i + 1)])
+        shifts_sum_i = model.quicksum([x[j % num_hours] for j in range(i - 7, i + 1)])
         model.addConstr(z[i] >= demands[i] - shifts_sum_i)
         model.addConstr(z[i] >= shifts_sum_i - demands[i])
-    model.setObjective(z.sum(), g.GRB.MINIMIZE)
+    model.setObjective(z.sum(), milpmodel.MINIMIZE)
     model.optimize()
-    print([int(x_i.getAttr('x')) for i, x_i in x.items()])
-    print(sum([z_i.getAttr('x') for _, z_i in z.items()]))
-    shifts = [str(int(x_i.getAttr('x'))) for i, x_i in x.items()]
-    obj_val = int(sum([z_i.getAttr('x') for _, z_i in z.items()]))
+    print([int(x_i.x) for i, x_i in x.items()])
+    print(sum([z_i.x for _, z_i in z.items()]))
+    shifts = [str(int(x_i.x)) for i, x_i in x.items()]
+    obj_val = int(sum([z_i.x for _, z_i in z.items()]))
     write_to_file(obj_val, shifts, out_f)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Compares the max-flow engines on generated reviewer assignment instances of growing size.
+usage: benchmark.py [--sizes 50 100 200] [--density 20] [--seed 0] [--backend csr]
+"""
+import argparse
+import os
+import sys
+import time
+
+import maxflow
+from entites import InputData
+from mainv2 import build_graph
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+import generators  # noqa: E402
+from maxflow_engines import ENGINES  # noqa: E402
+
+
+def generate_instance(c_size, p_size, density, seed) -> InputData:
+    customers, product_lbs = generators.reviewer_instance(c_size, p_size, density, seed)
+    data = InputData(c_size, p_size)
+    for c, (lb, ub, products) in zip(data.customers.values(), customers):
+        c.lb, c.ub, c.products = lb, ub, products
+        for p in products:
+            data.products[p].ub += 1
+    for p, lb in zip(data.products.values(), product_lbs):
+        p.lb = lb
+    return data
+
+
+def run_engine(data: InputData, backend, engine):
+    start = time.perf_counter()
+    g = build_graph(data, backend)
+    g_hat = maxflow.build_graph_with_zero_lb(g, in_place=True)
+    maxflow.maximise_flow(g_hat, engine)
+    feasible = maxflow.s_hat_edges_saturated(g_hat)
+    if feasible:
+        maxflow.assign_flow(g_hat, g)
+        maxflow.maximise_flow(g, engine, in_place=True)
+    return feasible, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 100, 200, 400])
+    parser.add_argument('--density', type=int, default=20, help='number of products listed by every customer')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=('object', 'csr'), default='csr')
+    args = parser.parse_args()
+
+    print(f'{"size":>6} {"edges":>8} ' + ' '.join(f'{e:>14}' for e in ENGINES) + '  feasible')
+    for size in args.sizes:
+        data = generate_instance(size, size, args.density, args.seed + size)
+        results = [run_engine(data, args.backend, engine) for engine in ENGINES]
+        feasible = {r[0] for r in results}
+        if len(feasible) != 1:
+            raise AssertionError(f'Engines disagree on feasibility for size {size}')
+        num_edges = 2 * size + sum(len(c.products) for c in data.customers.values())
+        print(f'{size:>6} {num_edges:>8} ' + ' '.join(f'{r[1]:>13.3f}s' for r in results) + f'  {feasible.pop()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import os
+import sys
+from array import array
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+from maxflow_engines import ENGINES  # noqa: E402
+
+# stands in for float('inf') on the sink -> source edge, the arrays hold int64 only
+INF_CAPACITY = np.iinfo(np.int64).max // 4
+
+
+class ResidualCSR:
+    """
+    Residual network in compressed sparse row order. Every edge e of the graph owns two arcs, the forward arc with
+    capacity ub and its twin with capacity -lb. Flow on the twin is always the negated flow of the forward arc, so the
+    residual capacity of any arc is cap - flow.
+    """
+
+    def __init__(self, num_nodes: int, tail: np.ndarray, head: np.ndarray, lb: np.ndarray, ub: np.ndarray):
+        num_edges = tail.shape[0]
+        arc_tail = np.concatenate((tail, head))
+        order = np.argsort(arc_tail, kind='stable')
+        position = np.empty_like(order)
+        position[order] = np.arange(order.shape[0])
+        twin = np.concatenate((np.arange(num_edges, 2 * num_edges), np.arange(num_edges)))
+
+        self.num_nodes = num_nodes
+        self.start: np.ndarray = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(arc_tail, minlength=num_nodes), out=self.start[1:])
+        self.head: np.ndarray = np.concatenate((head, tail))[order]
+        self.cap: np.ndarray = np.concatenate((ub, -lb))[order]
+        self.rev: np.ndarray = position[twin[order]]
+        # edge id for forward arcs, -1 - edge id for twins
+        self.arc_edge: np.ndarray = np.concatenate((np.arange(num_edges), -1 - np.arange(num_edges)))[order]
+        self.edge_arc: np.ndarray = position[:num_edges]
+
+    def arc_flow(self, edge_flow: np.ndarray) -> np.ndarray:
+        forward = self.arc_edge >= 0
+        flow = edge_flow[np.where(forward, self.arc_edge, -1 - self.arc_edge)]
+        return np.where(forward, flow, -flow)
+
+
+class CSRMaxFlowGraph:
+    """
+    Array backed counterpart of MaxFlowGraph. Nodes are plain ints and edges are rows of typed arrays, node and edge
+    ids are assigned in the same order as in MaxFlowGraph. The residual network is laid out lazily as ResidualCSR.
+    """
+
+    def __init__(self):
+        self.num_nodes = 0
+        self.num_edges = 0
+        self.node_names: List[Any] = []
+        self.node_mapping: Dict[Any, int] = {}
+        self.tail = array('q')
+        self.head = array('q')
+        self.lb = array('q')
+        self.ub = array('q')
+        self.flow = array('q')
+        self.aux_edges: List[int] = []
+        self._csr: ResidualCSR = None
+
+        self.source: int = self.add_node()
+        self.sink: int = self.add_node()
+        self.source_hat: int = None
+        self.sink_hat: int = None
+
+    def add_node(self, name=None) -> int:
+        self.node_names.append(name)
+        self.num_nodes += 1
+        self._csr = None
+        return self.num_nodes - 1
+
+    def add_node_by_name(self, name) -> int:
+        self.node_mapping[name] = self.add_node(name)
+        return self.node_mapping[name]
+
+    def add_edge(self, src: int, dst: int, lb, ub, flow=0, e_type='forward') -> int:
+        if e_type not in ('forward', 'aux'):
+            raise ValueError(f'Unknown e_type: {e_type}')
+        self.tail.append(src)
+        self.head.append(dst)
+        self.lb.append(lb)
+        self.ub.append(min(ub, INF_CAPACITY))
+        self.flow.append(flow)
+        if e_type == 'aux':
+            self.aux_edges.append(self.num_edges)
+        self.num_edges += 1
+        self._csr = None
+        return self.num_edges - 1
+
+    def add_edges(self, tail, head, lb, ub) -> range:
+        """
+        Appends forward edges from equally long int sequences (e.g. numpy arrays) at once
+        :return: ids of the new edges
+        """
+        first = self.num_edges
+        for field, values in ((self.tail, tail), (self.head, head), (self.lb, lb),
+                              (self.ub, np.minimum(ub, INF_CAPACITY))):
+            field.frombytes(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+        self.flow.frombytes(bytes(8 * (len(self.tail) - len(self.flow))))
+        self.num_edges = len(self.tail)
+        self._csr = None
+        return range(first, self.num_edges)
+
+    @property
+    def g_source(self) -> int:
+        return self.source if self.source_hat is None else self.source_hat
+
+    @property
+    def g_sink(self) -> int:
+        return self.sink if self.sink_hat is None else self.sink_hat
+
+    @property
+    def csr(self) -> ResidualCSR:
+        if self._csr is None:
+            self._csr = ResidualCSR(self.num_nodes, *self.edge_arrays())
+        return self._csr
+
+    def edge_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return tuple(np.frombuffer(a, dtype=np.int64) for a in (self.tail, self.head, self.lb, self.ub))
+
+    def flow_array(self) -> np.ndarray:
+        return np.frombuffer(self.flow, dtype=np.int64)
+
+    def out_edges(self, v: int) -> np.ndarray:
+        csr = self.csr
+        arcs = csr.arc_edge[csr.start[v]:csr.start[v + 1]]
+        return arcs[arcs >= 0]
+
+
+def s_hat_edges_saturated(g: CSRMaxFlowGraph):
+    for e in g.out_edges(g.g_source):
+        if g.ub[e] != g.flow[e]:
+            return False
+    return True
+
+
+def assign_flow(g_src: CSRMaxFlowGraph, g_dst: CSRMaxFlowGraph):
+    flow = g_dst.flow_array()
+    flow[:] = g_src.flow_array()[:g_dst.num_edges] + np.frombuffer(g_dst.lb, dtype=np.int64)
+
+
+def build_graph_with_zero_lb(g: CSRMaxFlowGraph) -> CSRMaxFlowGraph:
+    tail, head, lb, ub = g.edge_arrays()
+    g_hat = CSRMaxFlowGraph()
+    for name in g.node_names[2:]:
+        g_hat.add_node(name)
+    g_hat.node_mapping = dict(g.node_mapping)
+    g_hat.tail.extend(g.tail)
+    g_hat.head.extend(g.head)
+    g_hat.lb.frombytes(bytes(8 * g.num_edges))
+    g_hat.ub.frombytes((ub - lb).tobytes())
+    g_hat.flow.frombytes(bytes(8 * g.num_edges))
+    g_hat.num_edges = g.num_edges
+    g_hat.aux_edges = list(g.aux_edges)
+    g_hat.source_hat = g_hat.add_node()
+    g_hat.sink_hat = g_hat.add_node()
+
+    balance = np.bincount(head, lb, g.num_nodes).astype(np.int64) - np.bincount(tail, lb, g.num_nodes).astype(np.int64)
+    for node in np.flatnonzero(balance).tolist():
+        if balance[node] > 0:
+            g_hat.add_edge(g_hat.source_hat, node, lb=0, ub=int(balance[node]), e_type='aux')
+        else:
+            g_hat.add_edge(node, g_hat.sink_hat, lb=0, ub=-int(balance[node]), e_type='aux')
+
+    g_hat.add_edge(g_hat.sink, g_hat.source, lb=0, ub=INF_CAPACITY, e_type='aux')
+    return g_hat
+
+
+def maximise_flow(g: CSRMaxFlowGraph, engine='edmonds-karp'):
+    csr = g.csr
+    flow = csr.arc_flow(g.flow_array()).tolist()
+    ENGINES[engine](g.num_nodes, g.g_source, g.g_sink,
+                    csr.start.tolist(), csr.head.tolist(), csr.cap.tolist(), csr.rev.tolist(), flow)
+    g.flow_array()[:] = np.asarray(flow, dtype=np.int64)[csr.edge_arc]
@@ -1,7 +1,17 @@
+import argparse
+import os
 import sys
 
+import numpy as np
+
+import maxflow
+from csrgraph import CSRMaxFlowGraph
 from entites import InputData
-from maxflow import MaxFlowGraph, build_graph_with_zero_lb, maximise_flow, s_hat_edges_saturated, assign_flow
+from maxflow import MaxFlowGraph
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+from bulkinput import InputArrays, read_input_arrays  # noqa: E402
+from maxflow_engines import ENGINES  # noqa: E402
 
 
 def read_input(path):
@@ -34,8 +44,8 @@ def save_output(path, reviews):
                 f.write('\n')
 
 
-def build_graph(data: InputData):
-    g = MaxFlowGraph()
+def build_graph(data: InputData, backend='object'):
+    g = CSRMaxFlowGraph() if backend == 'csr' else MaxFlowGraph()
     for c_id, c in data.customers.items():
         c_node = g.add_node_by_name(f'c_{c_id}')
         g.add_edge(g.source, c_node, c.lb, c.ub)
@@ -53,9 +63,47 @@ def build_graph(data: InputData):
     return g
 
 
+def build_graph_from_arrays(data: InputArrays, backend='object'):
+    """
+    Same graph as build_graph, straight from the arrays of bulkinput.read_input_arrays
+    """
+    g = CSRMaxFlowGraph() if backend == 'csr' else MaxFlowGraph()
+    c_nodes = [g.add_node_by_name(f'c_{c_id}') for c_id in range(1, data.c_size + 1)]
+    p_nodes = [g.add_node_by_name(f'p_{p_id + 1}') for p_id in range(data.p_size)]
+    num_products = np.diff(data.offsets)
+    if backend == 'csr':
+        c_ids = np.arange(data.c_size) + c_nodes[0] if c_nodes else np.empty(0, dtype=np.int64)
+        p_ids = np.arange(data.p_size) + p_nodes[0] if p_nodes else np.empty(0, dtype=np.int64)
+        g.add_edges(np.full(data.c_size, g.source), c_ids, data.c_lb, data.c_ub)
+        g.add_edges(p_ids, np.full(data.p_size, g.sink), data.p_lb, data.p_ub)
+        g.add_edges(np.repeat(c_ids, num_products), p_ids[data.products], np.zeros(data.products.shape[0]),
+                    np.ones(data.products.shape[0]))
+        return g
+
+    for c_node, lb, ub in zip(c_nodes, data.c_lb.tolist(), data.c_ub.tolist()):
+        g.add_edge(g.source, c_node, lb, ub)
+    for p_node, lb, ub in zip(p_nodes, data.p_lb.tolist(), data.p_ub.tolist()):
+        g.add_edge(p_node, g.sink, lb, ub)
+    products = data.products.tolist()
+    offsets = data.offsets.tolist()
+    for c, c_node in enumerate(c_nodes):
+        for p in products[offsets[c]:offsets[c + 1]]:
+            g.add_edge(c_node, p_nodes[p], lb=0, ub=1)
+    return g
+
+
+def get_review_assignments_csr(g: CSRMaxFlowGraph, data: InputData):
+    assignments = [[] for _ in range(data.c_size)]
+    for c_id in range(1, data.c_size + 1):
+        for e in g.out_edges(g.node_mapping[f'c_{c_id}']):
+            if g.flow[e] == 1:
+                assignments[c_id-1].append(g.node_names[g.head[e]].split('_')[1])
+    return assignments
+
+
 def get_review_assignments(g: MaxFlowGraph, data: InputData):
-    assignments = [[] for _ in range(len(data.customers))]
-    for c_id in data.customers.keys():
+    assignments = [[] for _ in range(data.c_size)]
+    for c_id in range(1, data.c_size + 1):
         node = g.node_mapping[f'c_{c_id}']
         for e in node.out_edges.values():
             if e.flow == 1:
@@ -63,21 +111,51 @@ def get_review_assignments(g: MaxFlowGraph, data: InputData):
     return assignments
 
 
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--backend', choices=('object', 'csr'), default='object',
+                        help='graph representation, csr keeps the residual network in flat arrays')
+    parser.add_argument('--engine', choices=tuple(ENGINES.keys()), default='edmonds-karp',
+                        help='max-flow algorithm')
+    parser.add_argument('--reader', choices=('bulk', 'lines'), default='bulk',
+                        help='bulk tokenises the whole input with numpy, lines is the original line by line parser')
+    parser.add_argument('--cache', action='store_true',
+                        help='bulk reader only, keep the parsed input in the instance cache ($KO_CACHE_DIR)')
+    parser.add_argument('--copy', action='store_true',
+                        help='object backend only, solve on deep copies of the graph instead of flow overlays')
+    args = parser.parse_args()
+    if args.cache and args.reader != 'bulk':
+        parser.error('--cache needs --reader bulk')
+    return args
+
+
+def solve(g, data: InputData, engine='edmonds-karp', in_place=True):
+    """
+    :param g: graph from build_graph
+    :return: review assignments or [[-1]] if there is no feasible one
+    """
+    g_hat = maxflow.build_graph_with_zero_lb(g, in_place=in_place)
+    maxflow.maximise_flow(g_hat, engine)
+    if not maxflow.s_hat_edges_saturated(g_hat):
+        return [[-1]]
+    maxflow.assign_flow(g_hat, g)
+    maxflow.maximise_flow(g, engine, in_place=in_place)
+    if isinstance(g, CSRMaxFlowGraph):
+        return get_review_assignments_csr(g, data)
+    return get_review_assignments(g, data)
+
+
 def main():
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
-    data = read_input(input_path)
-    g = build_graph(data)
-    g_hat = build_graph_with_zero_lb(g)
-    maximise_flow(g_hat)
-    if s_hat_edges_saturated(g_hat):
-        assign_flow(g_hat, g)
-        maximise_flow(g)
-        reviews = get_review_assignments(g, data)
+    args = parse_args()
+    if args.reader == 'bulk':
+        data = read_input_arrays(args.input_path, args.cache)
+        g = build_graph_from_arrays(data, args.backend)
     else:
-        reviews = [[-1]]
-
-    save_output(output_path, reviews)
+        data = read_input(args.input_path)
+        g = build_graph(data, args.backend)
+    save_output(args.output_path, solve(g, data, args.engine, in_place=not args.copy))
 
 
 if __name__ == '__main__':
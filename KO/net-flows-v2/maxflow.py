@@ -2,6 +2,10 @@ import copy
 from collections import deque
 from typing import Dict, Any, List, Union, Tuple
 
+import numpy as np
+
+import csrgraph
+from csrgraph import INF_CAPACITY, CSRMaxFlowGraph, ResidualCSR
 from graphv2 import Graph, Node, Edge
 
 
@@ -17,6 +21,11 @@ class MaxFlowGraph(Graph):
         self.forward_edges = {}
         self.backward_edges = {}
         self.aux_edges = {}
+        self._arrays: EdgeArrays = None
+
+    def add_node(self, name=None) -> Node:
+        self._arrays = None
+        return super(MaxFlowGraph, self).add_node(name)
 
     def add_node_by_name(self, name):
         self.node_mapping[name] = self.add_node(name)
@@ -30,6 +39,7 @@ class MaxFlowGraph(Graph):
             self.aux_edges[e.id] = e
         else:
             raise ValueError(f'Unknown e_type: {e_type}')
+        self._arrays = None
         return e
 
     def add_reverse_edge(self, e: Edge):
@@ -37,8 +47,13 @@ class MaxFlowGraph(Graph):
         e.reverse = e_rev
         e_rev.reverse = e
         self.backward_edges[e.id] = e
+        self._arrays = None
         return e_rev
 
+    def remove_edge(self, edge_id: int):
+        super(MaxFlowGraph, self).remove_edge(edge_id)
+        self._arrays = None
+
     @property
     def g_source(self):
         return self.source if self.source_hat is None else self.source_hat
@@ -52,20 +67,156 @@ class MaxFlowGraph(Graph):
             if e.ub != 0:
                 self.add_reverse_edge(e)
 
+    def edge_arrays(self) -> 'EdgeArrays':
+        """
+        Topology and bounds of the graph as arrays, built on the first call and kept until nodes or edges are added or
+        removed. Bounds changed on the edges afterwards need invalidate_arrays.
+        """
+        if self._arrays is None:
+            self._arrays = EdgeArrays.from_graph(self)
+        return self._arrays
+
+    def invalidate_arrays(self):
+        self._arrays = None
+
+
+class EdgeArrays:
+    """
+    Immutable array form of a max-flow network, position i holds the edge edge_ids[i]. The residual network and the
+    zero lower bound network are derived once and shared by every FlowOverlay of the arrays.
+    """
+
+    def __init__(self, num_nodes: int, source: int, sink: int, edge_ids: np.ndarray, tail: np.ndarray,
+                 head: np.ndarray, lb: np.ndarray, ub: np.ndarray):
+        self.num_nodes = num_nodes
+        self.source = source
+        self.sink = sink
+        self.edge_ids = edge_ids
+        self.tail = tail
+        self.head = head
+        self.lb = lb
+        self.ub = ub
+        self._csr: ResidualCSR = None
+        self._zero_lb: EdgeArrays = None
+
+    @classmethod
+    def from_graph(cls, g: MaxFlowGraph) -> 'EdgeArrays':
+        edges = [g.edge_dict[e_id] for e_id in sorted(g.edge_dict.keys())]
+
+        def field(values):
+            return np.fromiter(values, dtype=np.int64, count=len(edges))
+        return cls(max(g.node_dict.keys()) + 1, g.g_source.id, g.g_sink.id, field([e.id for e in edges]),
+                   field([e.src.id for e in edges]), field([e.dst.id for e in edges]), field([e.lb for e in edges]),
+                   field([min(e.ub, INF_CAPACITY) for e in edges]))
+
+    @property
+    def num_edges(self):
+        return self.edge_ids.shape[0]
+
+    @property
+    def csr(self) -> ResidualCSR:
+        if self._csr is None:
+            self._csr = ResidualCSR(self.num_nodes, self.tail, self.head, self.lb, self.ub)
+        return self._csr
+
+    def zero_lb(self) -> 'EdgeArrays':
+        """
+        Network without lower bounds whose max flow saturates the edges out of its source iff the bounds are feasible,
+        the first num_edges positions are the edges of this network, the auxiliary edges follow
+        """
+        if self._zero_lb is None:
+            source_hat, sink_hat = self.num_nodes, self.num_nodes + 1
+            balance = np.bincount(self.head, self.lb, self.num_nodes).astype(np.int64) - \
+                np.bincount(self.tail, self.lb, self.num_nodes).astype(np.int64)
+            excess, deficit = np.flatnonzero(balance > 0), np.flatnonzero(balance < 0)
+            num_aux = excess.shape[0] + deficit.shape[0] + 1
+            self._zero_lb = EdgeArrays(
+                self.num_nodes + 2, source_hat, sink_hat, np.arange(self.num_edges + num_aux),
+                np.concatenate((self.tail, np.full(excess.shape[0], source_hat), deficit, [self.sink])),
+                np.concatenate((self.head, excess, np.full(deficit.shape[0], sink_hat), [self.source])),
+                np.zeros(self.num_edges + num_aux, dtype=np.int64),
+                np.concatenate((self.ub - self.lb, balance[excess], -balance[deficit], [INF_CAPACITY])))
+        return self._zero_lb
+
+
+class FlowOverlay:
+    """
+    Flow of one solve laid over EdgeArrays, the only state which is not shared with the base graph
+    """
+
+    def __init__(self, arrays: EdgeArrays, flow: np.ndarray = None):
+        self.arrays = arrays
+        self.flow = np.zeros(arrays.num_edges, dtype=np.int64) if flow is None else flow
+
+    @classmethod
+    def of_graph(cls, g: MaxFlowGraph) -> 'FlowOverlay':
+        arrays = g.edge_arrays()
+        return cls(arrays, np.fromiter([g.edge_dict[e_id].flow for e_id in arrays.edge_ids.tolist()],
+                                       dtype=np.int64, count=arrays.num_edges))
+
+    @property
+    def num_nodes(self):
+        return self.arrays.num_nodes
+
+    @property
+    def g_source(self):
+        return self.arrays.source
+
+    @property
+    def g_sink(self):
+        return self.arrays.sink
+
+    @property
+    def csr(self) -> ResidualCSR:
+        return self.arrays.csr
+
+    def flow_array(self) -> np.ndarray:
+        return self.flow
+
+    def write_back(self, g: MaxFlowGraph, offset: np.ndarray = None):
+        """
+        :param offset: added to the flow of every edge, e.g. the lower bounds
+        """
+        flow = self.flow[:g.edge_arrays().num_edges]
+        if offset is not None:
+            flow = flow + offset
+        for e_id, f in zip(g.edge_arrays().edge_ids.tolist(), flow.tolist()):
+            g.edge_dict[e_id].flow = f
+
 
-def s_hat_edges_saturated(g: MaxFlowGraph):
+def s_hat_edges_saturated(g: Union[MaxFlowGraph, CSRMaxFlowGraph, FlowOverlay]):
+    if isinstance(g, FlowOverlay):
+        out = g.arrays.tail == g.g_source
+        return bool(np.array_equal(g.flow[out], g.arrays.ub[out]))
+    if isinstance(g, CSRMaxFlowGraph):
+        return csrgraph.s_hat_edges_saturated(g)
     for e in g.g_source.out_edges.values():
         if e.ub != e.flow:
             return False
     return True
 
 
-def assign_flow(g_src: MaxFlowGraph, g_dst: MaxFlowGraph):
+def assign_flow(g_src: Union[MaxFlowGraph, CSRMaxFlowGraph, FlowOverlay], g_dst: Union[MaxFlowGraph, CSRMaxFlowGraph]):
+    if isinstance(g_dst, CSRMaxFlowGraph):
+        csrgraph.assign_flow(g_src, g_dst)
+        return
+    if isinstance(g_src, FlowOverlay):
+        g_src.write_back(g_dst, g_dst.edge_arrays().lb)
+        return
     for e_id, e in g_dst.edge_dict.items():
         e.flow = g_src.edge_dict[e_id].flow + e.lb
 
 
-def build_graph_with_zero_lb(g: MaxFlowGraph) -> MaxFlowGraph:
+def build_graph_with_zero_lb(g: Union[MaxFlowGraph, CSRMaxFlowGraph], in_place=False) \
+        -> Union[MaxFlowGraph, CSRMaxFlowGraph, FlowOverlay]:
+    """
+    :param in_place: instead of a deep copy of g return a FlowOverlay of the zero lower bound network of its
+                     EdgeArrays, the auxiliary edges follow the edges of g
+    """
+    if isinstance(g, CSRMaxFlowGraph):
+        return csrgraph.build_graph_with_zero_lb(g)
+    if in_place:
+        return FlowOverlay(g.edge_arrays().zero_lb())
     g_hat = copy.deepcopy(g)
     g_hat.source_hat = g_hat.add_node()
     g_hat.sink_hat = g_hat.add_node()
@@ -88,7 +239,19 @@ def build_graph_with_zero_lb(g: MaxFlowGraph) -> MaxFlowGraph:
     return g_hat
 
 
-def maximise_flow(g: MaxFlowGraph):
+def maximise_flow(g: Union[MaxFlowGraph, CSRMaxFlowGraph, FlowOverlay], engine='edmonds-karp', in_place=False):
+    """
+    :param in_place: run the engine on a FlowOverlay of g instead of a deep copy, always used by engines other than
+                     edmonds-karp
+    """
+    if isinstance(g, (CSRMaxFlowGraph, FlowOverlay)):
+        csrgraph.maximise_flow(g, engine)
+        return
+    if in_place or engine != 'edmonds-karp':
+        overlay = FlowOverlay.of_graph(g)
+        csrgraph.maximise_flow(overlay, engine)
+        overlay.write_back(g)
+        return
     g_copy = copy.deepcopy(g)
     g_copy.add_reverse_edges()
     while True:
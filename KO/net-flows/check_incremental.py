@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Checks IncrementalSolver warm started from the graph solved by main.solve against main.solve on the updated input,
+for the given instances and random ones under random bound and edge updates. Both must agree on feasibility and every
+assignment of the solver must respect the bounds of the updated input.
+usage: check_incremental.py [instance ...] [--random 20] [--updates 30] [--seed 0]
+"""
+import argparse
+import copy
+import glob
+import os
+import random
+
+import graph
+from entites import InputData
+from incremental import IncrementalSolver
+from main import read_input, solve
+
+
+def is_valid(data: InputData, reviews):
+    counts = [0] * data.p_size
+    for c_id, products in enumerate(reviews, 1):
+        c = data.customers[c_id]
+        if not c.lb <= len(products) <= c.ub or len(set(products)) != len(products):
+            return False
+        for p in products:
+            if p - 1 not in c.products:
+                return False
+            counts[p - 1] += 1
+    return all([data.products[p].lb <= counts[p] <= data.products[p].ub for p in range(data.p_size)])
+
+
+def random_input(rnd: random.Random, c_size, p_size) -> InputData:
+    data = InputData(c_size, p_size)
+    for c in data.customers.values():
+        c.products = rnd.sample(range(p_size), rnd.randint(0, p_size))
+        c.lb = rnd.randint(0, len(c.products))
+        c.ub = rnd.randint(c.lb, len(c.products))
+        for p in c.products:
+            data.products[p].ub += 1
+    for p in data.products.values():
+        p.lb = rnd.randint(0, p.ub // 2)
+    return data
+
+
+def random_update(rnd: random.Random, data: InputData, solver: IncrementalSolver):
+    """
+    Applies the same random update to data and solver
+    """
+    c_id, p_id = rnd.randint(1, data.c_size), rnd.randrange(data.p_size)
+    c, kind = data.customers[c_id], rnd.randrange(4)
+    if kind == 0:
+        c.lb = rnd.randint(0, len(c.products))
+        c.ub = rnd.randint(c.lb, len(c.products))
+        solver.set_customer_bounds(c_id, c.lb, c.ub)
+    elif kind == 1:
+        data.products[p_id].lb = rnd.randint(0, data.products[p_id].ub)
+        solver.set_product_lb(p_id, data.products[p_id].lb)
+    elif p_id not in c.products:
+        c.products.append(p_id)
+        data.products[p_id].ub += 1
+        solver.add_product(c_id, p_id)
+    elif c.ub < len(c.products) and data.products[p_id].lb < data.products[p_id].ub:
+        c.products.remove(p_id)
+        data.products[p_id].ub -= 1
+        solver.remove_product(c_id, p_id)
+
+
+def check(data: InputData, rnd: random.Random, updates, name):
+    g = graph.build_graph_from_input(data)
+    solve(g)
+    solver = IncrementalSolver(g)
+    data = copy.deepcopy(data)
+    for step in range(updates + 1):
+        if step > 0:
+            random_update(rnd, data, solver)
+        expected = solve(graph.build_graph_from_input(data))
+        reviews = solver.get_review_assignments()
+        if (expected == [[-1]]) != (reviews == [[-1]]):
+            raise AssertionError(f'{name}: feasibility differs from main.solve after {step} updates')
+        if reviews != [[-1]] and not is_valid(data, reviews):
+            raise AssertionError(f'{name}: invalid assignments after {step} updates')
+
+
+def check_reduced_bounds():
+    """
+    A customer reviewing nothing after its bounds are set to 0 must not be assigned the reverse edge of its source edge
+    """
+    data = InputData(1, 2)
+    data.customers[1].lb, data.customers[1].ub, data.customers[1].products = 1, 1, [0, 1]
+    data.products[0].ub, data.products[1].ub = 1, 1
+    g = graph.build_graph_from_input(data)
+    solve(g)
+    solver = IncrementalSolver(g)
+    solver.set_customer_bounds(1, 0, 0)
+    if solver.get_review_assignments() != [[]]:
+        raise AssertionError(f'reduced bounds: got {solver.get_review_assignments()}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('instances', nargs='*')
+    parser.add_argument('--random', type=int, default=20)
+    parser.add_argument('--updates', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    instances = args.instances or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                'data/public/instances/*.txt')))
+    rnd = random.Random(args.seed)
+    check_reduced_bounds()
+    for path in instances:
+        check(read_input(path), rnd, args.updates, path)
+    for i in range(args.random):
+        check(random_input(rnd, rnd.randint(1, 8), rnd.randint(1, 8)), rnd, args.updates, f'random instance {i}')
+    print(f'{len(instances) + args.random + 1} instances, IncrementalSolver agrees with main.solve')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,13 @@
+import os
+import sys
 from entites import InputData
 from typing import List, Union, Dict
 from collections import deque
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+from bulkinput import InputArrays  # noqa: E402
+from maxflow_engines import ENGINES  # noqa: E402
+
 
 class Edge:
     def __init__(self, s, t, flow=0, lb=0, ub=0):
@@ -11,6 +17,7 @@ class Edge:
         self.t: int = t  # sink vertex
         self.flow: int = flow
         self.reverse: Edge = None
+        self.is_reverse: bool = False
 
 
 class Graph:
@@ -51,15 +58,29 @@ class Graph:
     def get_balance_of(self, v):
         return sum([e.lb for e in self.get_in_edges_of(v)]) - sum([e.lb for e in self.get_out_edges_of(v)])
 
+    def remove_edge(self, e: Edge):
+        self.adj_list[e.s].remove(e)
+        self.in_edges[e.t].remove(e)
+        if self.edge_map[e.s].get(e.t) is e:
+            del self.edge_map[e.s][e.t]
+        if e.reverse is not None:
+            self.adj_list[e.t].remove(e.reverse)
+            e.reverse.reverse = None
+            e.reverse = None
+
+    def add_reverse_edge(self, e: Edge):
+        re = Edge(e.t, e.s, ub=0)
+        re.is_reverse = True
+        re.reverse = e
+        e.reverse = re
+        self._add_edge(re)
+
     def add_reverse_edges(self):
         for s in range(self.num_nodes):
             for e in self.get_out_edges_of(s):
                 if e.ub == 0:
                     continue
-                re = Edge(e.t, e.s, ub=0)
-                re.reverse = e
-                e.reverse = re
-                self._add_edge(re)
+                self.add_reverse_edge(e)
 
     @property
     def sink_idx(self):
@@ -86,6 +107,23 @@ def build_graph_from_input(data: InputData) -> Graph:
     return g
 
 
+def build_graph_from_arrays(data: InputArrays) -> Graph:
+    """
+    Same graph as build_graph_from_input, straight from the arrays of bulkinput.read_input_arrays
+    """
+    g = Graph(data.c_size, data.p_size)
+    products = data.products.tolist()
+    offsets = data.offsets.tolist()
+    for c, lb, ub in zip(range(data.c_size), data.c_lb.tolist(), data.c_ub.tolist()):
+        g.add_edge(g.source_idx, c + 1, lb=lb, ub=ub)
+        for p in products[offsets[c]:offsets[c + 1]]:
+            g.add_edge(c + 1, g.first_p + p, lb=0, ub=1)
+
+    for p_id, lb, ub in zip(range(data.p_size), data.p_lb.tolist(), data.p_ub.tolist()):
+        g.add_edge(g.first_p + p_id, g.sink_idx, lb=lb, ub=ub)
+    return g
+
+
 def build_graph_with_zero_lb(g: Graph) -> Graph:
     g_hat = Graph(g.c_size, g.p_size, additional_nodes=True)
     g_hat.add_edge(g.sink_idx, g.source_idx, 0, float('inf'))
@@ -126,11 +164,15 @@ def find_augmenting_path(g: Graph):
     return df, path
 
 
-def maximise_flow(g: Graph):
+def maximise_flow(g: Graph, engine='edmonds-karp'):
     """
     :param g: g_hat = build_graph_with_zero_lb(g) and g_hat.add_reverse_edges()
+    :param engine: one of engines.ENGINES
     :return:
     """
+    if engine != 'edmonds-karp':
+        _maximise_flow_csr(g, engine)
+        return
     while True:
         df, path = find_augmenting_path(g)
         if path[g.sink_idx] is None:
@@ -142,6 +184,37 @@ def maximise_flow(g: Graph):
             e = path[e.s]
 
 
+def _maximise_flow_csr(g: Graph, engine):
+    """
+    Lays the forward edges out as a CSR residual network (arc 2i is edge i, arc 2i + 1 its twin), runs the engine
+    and applies the change of flow to the edges and their reverse edges.
+    """
+    edges = [e for v in range(g.num_nodes) for e in g.get_in_edges_of(v)]
+    out_arcs = [[] for _ in range(g.num_nodes)]
+    for i, e in enumerate(edges):
+        out_arcs[e.s].append(2 * i)
+        out_arcs[e.t].append(2 * i + 1)
+    start, order = [0], []
+    for arcs in out_arcs:
+        order.extend(arcs)
+        start.append(len(order))
+    position = [0] * len(order)
+    for k, a in enumerate(order):
+        position[a] = k
+
+    head = [edges[a // 2].s if a % 2 else edges[a // 2].t for a in order]
+    cap = [-edges[a // 2].lb if a % 2 else edges[a // 2].ub for a in order]
+    flow = [-edges[a // 2].flow if a % 2 else edges[a // 2].flow for a in order]
+    rev = [position[a ^ 1] for a in order]
+    ENGINES[engine](g.num_nodes, g.source_idx, g.sink_idx, start, head, cap, rev, flow)
+
+    for i, e in enumerate(edges):
+        df = flow[position[2 * i]] - e.flow
+        e.flow += df
+        if e.reverse is not None:
+            e.reverse.flow -= df
+
+
 def s_hat_edges_saturated(g: Graph):
     for e in g.get_out_edges_of(g.source_idx):
         if e.ub != e.flow:
@@ -153,6 +226,6 @@ def get_review_assignments(g: Graph):
     ret = [[] for _ in range(g.c_size)]
     for c in range(g.c_size):
         for e in g.get_out_edges_of(c + 1):
-            if e.flow == 1:
+            if e.flow == 1 and not e.is_reverse:
                 ret[c].append(e.t - g.first_p + 1)
     return ret
@@ -0,0 +1,190 @@
+from collections import deque
+from typing import Dict, List, Tuple, Union
+
+import graph
+from entites import InputData
+from graph import Edge, Graph
+
+# arc of the residual network: (edge, True) follows the edge, (edge, False) goes against it and
+# (None, direction) is the sink -> source arc closing the circulation in the given direction
+Arc = Tuple[Union[Edge, None], bool]
+
+
+class IncrementalSolver:
+    """
+    Keeps a flow of the reviewer assignment network and repairs it after bound or edge updates.
+    The network is closed into a circulation by a virtual sink -> source arc. Every update first clamps the flow of
+    the touched edges into [lb, ub], which leaves excess or deficit only at their end nodes. The repair then sends
+    the excess to the deficits along residual paths found by a BFS that stops at the first deficit node, so only the
+    part of the network around the change is visited. If some excess can not reach any deficit, no feasible flow
+    exists and the imbalance is kept until a later update makes the repair possible.
+    """
+
+    def __init__(self, g: Graph):
+        """
+        :param g: graph from graph.build_graph_from_input, its current flow (e.g. the result of main) is the
+                  starting point, a zero flow works too and is repaired into a feasible one
+        """
+        self.g = g
+        self.out_edges: List[List[Edge]] = [[] for _ in range(g.num_nodes)]
+        for v in range(g.num_nodes):
+            for e in g.get_in_edges_of(v):
+                self.out_edges[e.s].append(e)
+                # main adds the reverse edges after the flow is assigned
+                if e.reverse is not None:
+                    e.reverse.flow = -e.flow
+        self.value = 0
+        self.excess: Dict[int, int] = {}
+        self.inconsistent: Dict[Edge, None] = {}
+        for v in range(g.num_nodes):
+            balance = sum([e.flow for e in g.get_in_edges_of(v)]) - sum([e.flow for e in self.out_edges[v]])
+            if balance != 0:
+                self.excess[v] = balance
+        self._augment((None, True), sum([e.flow for e in self.out_edges[g.source_idx]]))
+        for v in range(g.num_nodes):
+            for e in self.out_edges[v]:
+                self._clamp(e)
+        self._repair()
+
+    @classmethod
+    def from_input(cls, data: InputData) -> 'IncrementalSolver':
+        return cls(graph.build_graph_from_input(data))
+
+    @property
+    def is_feasible(self) -> bool:
+        return len(self.excess) == 0 and len(self.inconsistent) == 0
+
+    def set_customer_bounds(self, c_id: int, lb: int, ub: int):
+        """
+        :param c_id: customer id as in InputData.customers, starting from 1
+        """
+        e = self.g.get_edge(self.g.source_idx, c_id)
+        e.lb, e.ub = lb, ub
+        self._clamp(e)
+        self._repair()
+
+    def set_product_lb(self, p_id: int, lb: int):
+        """
+        :param p_id: product id as in InputData.products, starting from 0
+        """
+        e = self.g.get_edge(self.g.first_p + p_id, self.g.sink_idx)
+        e.lb = lb
+        self._clamp(e)
+        self._repair()
+
+    def add_product(self, c_id: int, p_id: int):
+        p = self.g.first_p + p_id
+        self.g.add_edge(c_id, p, lb=0, ub=1)
+        e = self.g.get_edge(c_id, p)
+        self.g.add_reverse_edge(e)
+        self.out_edges[c_id].append(e)
+        p_edge = self.g.get_edge(p, self.g.sink_idx)
+        p_edge.ub += 1
+        self._clamp(p_edge)
+        self._repair()
+
+    def remove_product(self, c_id: int, p_id: int):
+        p = self.g.first_p + p_id
+        e = self.g.get_edge(c_id, p)
+        e.ub = 0
+        self._clamp(e)
+        self.inconsistent.pop(e, None)
+        self.g.remove_edge(e)
+        self.out_edges[c_id].remove(e)
+        p_edge = self.g.get_edge(p, self.g.sink_idx)
+        p_edge.ub -= 1
+        self._clamp(p_edge)
+        self._repair()
+
+    def get_review_assignments(self) -> List[List[int]]:
+        if not self.is_feasible:
+            return [[-1]]
+        return graph.get_review_assignments(self.g)
+
+    def _add_excess(self, v, df):
+        balance = self.excess.get(v, 0) + df
+        if balance == 0:
+            self.excess.pop(v, None)
+        else:
+            self.excess[v] = balance
+
+    def _clamp(self, e: Edge):
+        if e.lb > e.ub:
+            self.inconsistent[e] = None
+        else:
+            self.inconsistent.pop(e, None)
+        if e.flow > e.ub:
+            self._augment((e, False), e.flow - e.ub)
+        elif e.flow < min(e.lb, e.ub):
+            self._augment((e, True), min(e.lb, e.ub) - e.flow)
+
+    def _repair(self):
+        for v in [v for v, balance in self.excess.items() if balance > 0]:
+            while self.excess.get(v, 0) > 0:
+                path = self._find_path(v)
+                if path is None:
+                    break
+                w = self._arc_head(path[0])
+                df = min([self.excess[v], -self.excess[w]] + [self._residual(arc) for arc in path])
+                for arc in path:
+                    self._augment(arc, df)
+
+    def _residual(self, arc: Arc):
+        e, forward = arc
+        if e is None:
+            return float('inf') if forward else self.value
+        return e.ub - e.flow if forward else e.flow - e.lb
+
+    def _arc_head(self, arc: Arc):
+        e, forward = arc
+        if e is None:
+            return self.g.source_idx if forward else self.g.sink_idx
+        return e.t if forward else e.s
+
+    def _augment(self, arc: Arc, df):
+        e, forward = arc
+        if e is None:
+            self.value += df if forward else -df
+            s, t = (self.g.sink_idx, self.g.source_idx) if forward else (self.g.source_idx, self.g.sink_idx)
+        else:
+            e.flow += df if forward else -df
+            if e.reverse is not None:
+                e.reverse.flow -= df if forward else -df
+            s, t = (e.s, e.t) if forward else (e.t, e.s)
+        self._add_excess(s, -df)
+        self._add_excess(t, df)
+
+    def _arcs_of(self, v):
+        g = self.g
+        for e in self.out_edges[v]:
+            yield e.t, (e, True)
+        for e in g.get_in_edges_of(v):
+            yield e.s, (e, False)
+        if v == g.sink_idx:
+            yield g.source_idx, (None, True)
+        elif v == g.source_idx:
+            yield g.sink_idx, (None, False)
+
+    def _find_path(self, start) -> Union[List[Arc], None]:
+        """
+        :return: arcs of the shortest residual path from start to a node with deficit, from the last arc to the first
+        """
+        parent: Dict[int, Arc] = {start: None}
+        tails: Dict[int, int] = {}
+        q = deque()
+        q.append(start)
+        while len(q) > 0:
+            v = q.popleft()
+            for w, arc in self._arcs_of(v):
+                if w in parent or self._residual(arc) <= 0:
+                    continue
+                parent[w] = arc
+                tails[w] = v
+                if self.excess.get(w, 0) < 0:
+                    path = []
+                    while w != start:
+                        path.append(parent[w])
+                        w = tails[w]
+                    return path
+                q.append(w)
+        return None
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
+import argparse
+import os
 import sys
 import graph
 from entites import InputData
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+from bulkinput import read_input_arrays  # noqa: E402
+from maxflow_engines import ENGINES  # noqa: E402
+
 
 def read_input(path):
     with open(path, 'r') as f:
@@ -34,26 +40,49 @@ def save_output(path, reviews):
                 f.write('\n')
 
 
-def main():
-    in_path = sys.argv[1]
-    out_path = sys.argv[2]
-    data = read_input(in_path)
-    g = graph.build_graph_from_input(data)
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('in_path')
+    parser.add_argument('out_path')
+    parser.add_argument('--engine', choices=tuple(ENGINES.keys()), default='edmonds-karp',
+                        help='max-flow algorithm')
+    parser.add_argument('--reader', choices=('bulk', 'lines'), default='bulk',
+                        help='bulk tokenises the whole input with numpy, lines is the original line by line parser')
+    parser.add_argument('--cache', action='store_true',
+                        help='bulk reader only, keep the parsed input in the instance cache ($KO_CACHE_DIR)')
+    args = parser.parse_args()
+    if args.cache and args.reader != 'bulk':
+        parser.error('--cache needs --reader bulk')
+    return args
+
+
+def solve(g: graph.Graph, engine='edmonds-karp'):
+    """
+    :param g: graph from graph.build_graph_from_input
+    :return: review assignments or [[-1]] if there is no feasible one
+    """
     g_hat = graph.build_graph_with_zero_lb(g)
     g_hat.add_reverse_edges()
-    graph.maximise_flow(g_hat)
+    graph.maximise_flow(g_hat, engine)
     if graph.s_hat_edges_saturated(g_hat):
         for v in range(g.num_nodes):
             for e in g.get_out_edges_of(v):
                 e_hat = g_hat.get_edge(e.s, e.t)
                 e.flow = e_hat.flow + e.lb
         g.add_reverse_edges()
-        graph.maximise_flow(g)
-        reviews = graph.get_review_assignments(g)
-    else:
-        reviews = [[-1]]
+        graph.maximise_flow(g, engine)
+        return graph.get_review_assignments(g)
+    return [[-1]]
+
 
-    save_output(out_path, reviews)
+def main():
+    args = parse_args()
+    if args.reader == 'bulk':
+        g = graph.build_graph_from_arrays(read_input_arrays(args.in_path, args.cache))
+    else:
+        g = graph.build_graph_from_input(read_input(args.in_path))
+    save_output(args.out_path, solve(g, args.engine))
 
 
-main()
+if __name__ == '__main__':
+    main()
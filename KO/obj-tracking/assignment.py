@@ -0,0 +1,106 @@
+"""
+Solvers of the n x n assignment problem working directly on the cost matrix (e.g. InputData.get_distance_matrix).
+Both return an array where entry i is the column assigned to row i.
+"""
+import numpy as np
+
+
+def hungarian(cost: np.ndarray) -> np.ndarray:
+    """
+    Shortest augmenting path Hungarian method (Jonker-Volgenant style), O(n^3). Rows are inserted one by one,
+    every insertion runs a Dijkstra over the columns with reduced costs cost[i, j] - u[i] - v[j], vectorised over
+    the columns.
+    """
+    n, m = cost.shape
+    if n > m:
+        raise ValueError('The cost matrix needs at least as many columns as rows')
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    # row (1-based) assigned to column j, column 0 is the virtual start of every augmenting path
+    row_of = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        row_of[0] = i
+        j0 = 0
+        min_v = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = row_of[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < min_v[1:])
+            min_v[1:][better] = reduced[better]
+            way[1:][better] = j0
+            masked = np.where(free, min_v[1:], np.inf)
+            j1 = int(np.argmin(masked)) + 1
+            delta = masked[j1 - 1]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_v[1:][free] -= delta
+            j0 = j1
+            if row_of[j0] == 0:
+                break
+        while j0 != 0:
+            j1 = way[j0]
+            row_of[j0] = row_of[j1]
+            j0 = j1
+
+    assignment = np.empty(n, dtype=np.int64)
+    columns = np.flatnonzero(row_of[1:])
+    assignment[row_of[1:][columns] - 1] = columns
+    return assignment
+
+
+def auction(cost: np.ndarray, eps_final: float = None, scaling: float = 7.0) -> np.ndarray:
+    """
+    Jacobi auction algorithm with epsilon scaling. All unassigned rows bid at once for their best column, each
+    phase restarts the bidding with the prices of the previous one and a smaller epsilon.
+    The result is within n * eps_final of the optimal cost, eps_final defaults to 1e-9 of the cost range.
+    """
+    n, m = cost.shape
+    if n != m:
+        raise ValueError('The auction needs a square cost matrix')
+    if n == 1:
+        return np.zeros(1, dtype=np.int64)
+    benefit = -np.asarray(cost, dtype=np.float64)
+    cost_range = float(benefit.max() - benefit.min())
+    if eps_final is None:
+        eps_final = max(cost_range, 1.0) * 1e-9
+    prices = np.zeros(m)
+    eps = max(cost_range / 2, eps_final)
+    while True:
+        owner = np.full(m, -1, dtype=np.int64)
+        assignment = np.full(n, -1, dtype=np.int64)
+        unassigned = np.arange(n)
+        while unassigned.shape[0] > 0:
+            values = benefit[unassigned] - prices
+            best = np.argmax(values, axis=1)
+            rows = np.arange(unassigned.shape[0])
+            best_value = values[rows, best]
+            values[rows, best] = -np.inf
+            second_value = values.max(axis=1)
+            bids = prices[best] + best_value - second_value + eps
+
+            # the highest bid wins every column
+            order = np.lexsort((-bids, best))
+            first = np.ones(order.shape[0], dtype=bool)
+            first[1:] = best[order[1:]] != best[order[:-1]]
+            winners = order[first]
+            columns = best[winners]
+            prices[columns] = bids[winners]
+
+            previous = owner[columns]
+            assignment[previous[previous >= 0]] = -1
+            owner[columns] = unassigned[winners]
+            assignment[unassigned[winners]] = columns
+            unassigned = np.flatnonzero(assignment < 0)
+        if eps <= eps_final:
+            return assignment
+        eps = max(eps / scaling, eps_final)
+
+
+ASSIGNMENT_ENGINES = {
+    'hungarian': hungarian,
+    'auction': auction,
+}
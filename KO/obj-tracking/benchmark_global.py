@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Throughput of the global (windowed) min-cost flow against the per frame pair loop on generated sequences. With
+distances as costs the global optimum is the sum of the per pair optima and the bigger networks are slower to solve,
+so main keeps the per pair loop and solve_global is only used here.
+usage: benchmark_global.py [--objects 20] [--frames 30] [--windows 5 10 0] [--engine ssp] [--seed 0]
+"""
+import argparse
+import time
+
+from compare_engines import generate_instance
+from engines import ENGINES
+from mincostflow import build_mincost_graph, minimize_cost, get_obj_mapping, solve_global
+
+
+def solve_pairs(data, engine):
+    mappings = []
+    for frame in range(data.num_frames - 1):
+        g = build_mincost_graph(data, frame, frame + 1)
+        minimize_cost(g, engine)
+        mappings.append(get_obj_mapping(g))
+    return mappings
+
+
+def total_cost(data, mappings):
+    cost = 0.0
+    for frame, mapping in enumerate(mappings):
+        distance_matrix = data.get_distance_matrix(frame, frame + 1)
+        cost += sum([distance_matrix[i, j - 1] for i, j in enumerate(mapping)])
+    return cost
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--objects', type=int, default=20)
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--windows', type=int, nargs='+', default=[5, 10, 0], help='0 is the whole sequence')
+    parser.add_argument('--engine', choices=tuple(ENGINES.keys()), default='ssp')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data = generate_instance(args.objects, args.frames, args.seed)
+    runs = [('pairs', lambda: solve_pairs(data, args.engine))]
+    for window in args.windows:
+        runs.append((f'window {window or "all"}', lambda w=window: solve_global(data, args.engine, w)))
+
+    reference = None
+    print(f'{"mode":>12} {"time":>9} {"frames/s":>9} {"cost":>14}')
+    for name, run in runs:
+        start = time.perf_counter()
+        mappings = run()
+        elapsed = time.perf_counter() - start
+        cost = total_cost(data, mappings)
+        reference = cost if reference is None else reference
+        if abs(cost - reference) > 1e-6 * max(1.0, reference):
+            raise AssertionError(f'{name} cost {cost} differs from the per pair cost {reference}')
+        print(f'{name:>12} {elapsed:>8.3f}s {(args.frames - 1) / elapsed:>9.1f} {cost:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
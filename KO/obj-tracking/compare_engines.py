@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Regression check of the min-cost flow and assignment engines against cycle cancelling. Every frame pair of the given
+instances (and of generated ones) is solved by all engines, and by cycle cancelling with the bellman-ford cycle finder
+too, and the optimal costs have to match.
+usage: compare_engines.py [instance ...] [--random 20] [--seed 0]
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+
+import numpy as np
+
+from assignment import ASSIGNMENT_ENGINES
+from engines import ENGINES
+from inoutdata import InputData, read_input
+from mincostflow import build_mincost_graph, minimize_cost, get_total_cost
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import generators  # noqa: E402
+
+
+def generate_instance(num_objects, num_frames, seed) -> InputData:
+    data = InputData(num_objects, num_frames)
+    for frame, positions in enumerate(generators.tracking_instance(num_objects, num_frames, jitter=20, seed=seed)):
+        data.frames[frame] = np.array(positions, dtype=np.int64).reshape(num_objects, 2)
+    return data
+
+
+def compare(data: InputData, name):
+    for frame in range(data.num_frames - 1):
+        costs = {}
+        for engine in ('cycle-cancelling',) + tuple(ENGINES.keys()):
+            g = build_mincost_graph(data, frame, frame + 1)
+            minimize_cost(g, engine)
+            costs[engine] = get_total_cost(g)
+        g = build_mincost_graph(data, frame, frame + 1)
+        minimize_cost(g, cycle_finder='bellman-ford')
+        costs['cycle-cancelling (bellman-ford)'] = get_total_cost(g)
+        distance_matrix = data.get_distance_matrix(frame, frame + 1)
+        for engine, solve in ASSIGNMENT_ENGINES.items():
+            assignment = solve(distance_matrix)
+            costs[engine] = distance_matrix[np.arange(data.num_objects), assignment].sum()
+        reference = costs['cycle-cancelling']
+        for engine, cost in costs.items():
+            if abs(cost - reference) > 1e-6 * max(1.0, abs(reference)):
+                raise AssertionError(f'{name}, frames {frame}-{frame + 1}: {engine} cost {cost} != {reference}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('instances', nargs='*')
+    parser.add_argument('--random', type=int, default=20, help='number of generated instances')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    instances = args.instances or sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'data/instances/*.txt')))
+    for path in instances:
+        compare(read_input(path), path)
+    rnd = random.Random(args.seed)
+    for i in range(args.random):
+        compare(generate_instance(rnd.randint(1, 15), 3, args.seed + i), f'random instance {i}')
+    print(f'{len(instances) + args.random} instances, all engines agree')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Min-cost flow engines working on plain edge lists. All engines take the same arguments:
+num_nodes and the python lists tail, head, lb, ub, cost of the edges and supply of the nodes, where supply[v] is the
+required outflow minus inflow of v. They return the list of optimal edge flows or raise ValueError if no flow
+satisfies the bounds and supplies.
+"""
+import heapq
+from collections import deque
+from typing import List
+
+# reduced costs above -EPS are treated as non-negative, the costs are float distances
+EPS = 1e-9
+
+
+def _initial_flow(tail, head, lb, ub, cost, supply, flow=None, potential=None):
+    """
+    Pseudo-flow without residual arcs of negative reduced cost: the given flow (the lower bounds by default) with the
+    arcs of negative reduced cost saturated and the arcs of positive reduced cost emptied.
+    :return: flow and the excess of every node, positive excess has to be sent to nodes with negative excess
+    """
+    flow = list(lb) if flow is None else list(flow)
+    for a in range(len(tail)):
+        rc = cost[a] if potential is None else cost[a] + potential[tail[a]] - potential[head[a]]
+        if rc < -EPS:
+            flow[a] = ub[a]
+        elif rc > EPS:
+            flow[a] = lb[a]
+    excess = list(supply)
+    for a, f in enumerate(flow):
+        excess[tail[a]] -= f
+        excess[head[a]] += f
+    return flow, excess
+
+
+def successive_shortest_paths(num_nodes, tail, head, lb, ub, cost, supply, flow=None, potential=None) -> List:
+    """
+    Successive shortest paths, Dijkstra on reduced costs with Johnson potentials. Residual arc 2a follows edge a and
+    arc 2a + 1 goes against it. Every Dijkstra run starts from all nodes with excess at once and stops at the first
+    node with deficit, potentials are updated with the distances capped at the distance of that node.
+    :param flow: warm start, only the arcs whose reduced cost contradicts it are changed before the first augmentation
+    :param potential: warm start potentials of the nodes, the list is updated in place to the final potentials
+    """
+    flow, excess = _initial_flow(tail, head, lb, ub, cost, supply, flow, potential)
+    out_arcs: List[List[int]] = [[] for _ in range(num_nodes)]
+    for a in range(len(tail)):
+        out_arcs[tail[a]].append(2 * a)
+        out_arcs[head[a]].append(2 * a + 1)
+    if potential is None:
+        potential = [0.0] * num_nodes
+
+    while True:
+        sources = [v for v in range(num_nodes) if excess[v] > 0]
+        if not sources:
+            return flow
+        dist = [float('inf')] * num_nodes
+        parent = [-1] * num_nodes
+        done = [False] * num_nodes
+        heap = []
+        for v in sources:
+            dist[v] = 0.0
+            heap.append((0.0, v))
+        heapq.heapify(heap)
+        target = -1
+        while heap:
+            d, v = heapq.heappop(heap)
+            if done[v]:
+                continue
+            done[v] = True
+            if excess[v] < 0:
+                target = v
+                break
+            for r in out_arcs[v]:
+                a = r >> 1
+                if r & 1:
+                    w, residual, c = tail[a], flow[a] - lb[a], -cost[a]
+                else:
+                    w, residual, c = head[a], ub[a] - flow[a], cost[a]
+                if residual <= 0 or done[w]:
+                    continue
+                nd = d + max(c + potential[v] - potential[w], 0.0)
+                if nd < dist[w]:
+                    dist[w] = nd
+                    parent[w] = r
+                    heapq.heappush(heap, (nd, w))
+        if target < 0:
+            raise ValueError('No feasible flow, some excess can not reach any deficit')
+
+        d_target = dist[target]
+        for v in range(num_nodes):
+            potential[v] += min(dist[v], d_target)
+
+        df = -excess[target]
+        v = target
+        while parent[v] >= 0:
+            r = parent[v]
+            a = r >> 1
+            if r & 1:
+                df = min(df, flow[a] - lb[a])
+                v = head[a]
+            else:
+                df = min(df, ub[a] - flow[a])
+                v = tail[a]
+        df = min(df, excess[v])
+        excess[v] -= df
+        excess[target] += df
+        v = target
+        while parent[v] >= 0:
+            r = parent[v]
+            a = r >> 1
+            if r & 1:
+                flow[a] -= df
+                v = head[a]
+            else:
+                flow[a] += df
+                v = tail[a]
+
+
+_LOWER, _TREE, _UPPER = 0, 1, 2
+
+
+def network_simplex(num_nodes, tail, head, lb, ub, cost, supply, block_size=None) -> List:
+    """
+    Primal network simplex with a strongly feasible spanning tree rooted in an artificial node. The initial tree
+    consists of big-M artificial arcs between the root and every node, entering arcs are chosen by block pricing.
+    After each pivot the tree structure (parents, depths and potentials) is rebuilt by a BFS from the root.
+    """
+    m = len(tail)
+    root = num_nodes
+    # shift the lower bounds to zero
+    cap = [u - l for l, u in zip(lb, ub)]
+    b = list(supply)
+    for a in range(m):
+        b[tail[a]] -= lb[a]
+        b[head[a]] += lb[a]
+    if sum(b) != 0:
+        raise ValueError('Supplies do not sum up to zero')
+
+    big_m = 1.0 + (num_nodes + 1) * max([abs(c) for c in cost], default=0.0)
+    inf_cap = sum([abs(x) for x in b]) + 1
+    tail, head, cost = list(tail), list(head), list(cost)
+    flow = [0] * m
+    state = [_LOWER] * m
+    for v in range(num_nodes):
+        if b[v] > 0:
+            tail.append(v)
+            head.append(root)
+            flow.append(b[v])
+        else:
+            tail.append(root)
+            head.append(v)
+            flow.append(-b[v])
+        cost.append(big_m)
+        cap.append(inf_cap)
+        state.append(_TREE)
+    n = num_nodes + 1
+    tree_arcs: List[set] = [set() for _ in range(n)]
+    for a in range(m, m + num_nodes):
+        tree_arcs[tail[a]].add(a)
+        tree_arcs[head[a]].add(a)
+
+    parent_arc = [-1] * n
+    depth = [0] * n
+    potential = [0.0] * n
+
+    def rebuild_tree():
+        parent_arc[root] = -1
+        depth[root] = 0
+        potential[root] = 0.0
+        q = deque()
+        q.append(root)
+        while len(q) > 0:
+            u = q.popleft()
+            for t_arc in tree_arcs[u]:
+                if t_arc == parent_arc[u]:
+                    continue
+                w = head[t_arc] if tail[t_arc] == u else tail[t_arc]
+                parent_arc[w] = t_arc
+                depth[w] = depth[u] + 1
+                # reduced cost cost + potential[tail] - potential[head] is zero on tree arcs
+                if tail[t_arc] == u:
+                    potential[w] = potential[u] + cost[t_arc]
+                else:
+                    potential[w] = potential[u] - cost[t_arc]
+                q.append(w)
+
+    rebuild_tree()
+    num_arcs = len(tail)
+    block_size = block_size or max(int(num_arcs ** 0.5), 10)
+    next_arc = 0
+    while True:
+        # block pricing
+        entering, best = -1, EPS
+        for checked in range(num_arcs):
+            a = (next_arc + checked) % num_arcs
+            if state[a] != _TREE:
+                rc = cost[a] + potential[tail[a]] - potential[head[a]]
+                violation = -rc if state[a] == _LOWER else rc
+                if violation > best:
+                    entering, best = a, violation
+            if entering >= 0 and (checked + 1) % block_size == 0:
+                next_arc = (a + 1) % num_arcs
+                break
+        if entering < 0:
+            break
+
+        # the entering arc is traversed from first to second, the cycle closes through the tree from second to first
+        if state[entering] == _LOWER:
+            first, second = tail[entering], head[entering]
+        else:
+            first, second = head[entering], tail[entering]
+
+        # walk up from both ends to the apex, collect (arc, forward) pairs oriented along the cycle
+        down, up = [], []
+        u, w = first, second
+        while u != w:
+            if depth[u] >= depth[w]:
+                t_arc = parent_arc[u]
+                # cycle goes parent -> u here
+                down.append((t_arc, head[t_arc] == u))
+                u = head[t_arc] if tail[t_arc] == u else tail[t_arc]
+            else:
+                t_arc = parent_arc[w]
+                # cycle goes w -> parent here
+                up.append((t_arc, tail[t_arc] == w))
+                w = head[t_arc] if tail[t_arc] == w else tail[t_arc]
+        cycle = list(reversed(down)) + [(entering, state[entering] == _LOWER)] + up
+
+        theta, leaving = None, -1
+        for a, forward in cycle:
+            residual = cap[a] - flow[a] if forward else flow[a]
+            # last blocking arc from the apex keeps the tree strongly feasible
+            if theta is None or residual <= theta:
+                theta, leaving = residual, a
+        for a, forward in cycle:
+            flow[a] += theta if forward else -theta
+
+        if leaving == entering:
+            state[entering] = _UPPER if state[entering] == _LOWER else _LOWER
+            continue
+        state[leaving] = _UPPER if flow[leaving] == cap[leaving] else _LOWER
+        state[entering] = _TREE
+        tree_arcs[tail[leaving]].discard(leaving)
+        tree_arcs[head[leaving]].discard(leaving)
+        tree_arcs[tail[entering]].add(entering)
+        tree_arcs[head[entering]].add(entering)
+        rebuild_tree()
+
+    if any(flow[a] > 0 for a in range(m, num_arcs)):
+        raise ValueError('No feasible flow, artificial arcs stay in use')
+    return [f + l for f, l in zip(flow[:m], lb)]
+
+
+ENGINES = {
+    'ssp': successive_shortest_paths,
+    'network-simplex': network_simplex,
+}
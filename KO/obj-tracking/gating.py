@@ -0,0 +1,154 @@
+"""
+Spatial gating of the frame to frame edges. Objects of the second frame are hashed into a uniform grid, the candidates
+of an object of the first frame are looked up only in the grid cells around it.
+"""
+from collections import deque
+from typing import List, Tuple, Union
+
+import numpy as np
+
+
+class GridIndex:
+    def __init__(self, points: np.ndarray, cell_size: float):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        cells = np.floor(self.points / self.cell_size).astype(np.int64)
+        self.origin = cells.min(axis=0)
+        cells -= self.origin
+        self.shape = cells.max(axis=0) + 1
+        keys = cells[:, 0] * self.shape[1] + cells[:, 1]
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def query_radius(self, queries: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: rows (indices into queries), cols (indices into points) and distances of all pairs within radius
+        """
+        queries = np.asarray(queries, dtype=np.float64)
+        q_cells = np.floor(queries / self.cell_size).astype(np.int64) - self.origin
+        reach = int(np.ceil(radius / self.cell_size))
+        q_rows = np.arange(queries.shape[0])
+        rows_list, cols_list = [], []
+        for dx in range(max(-reach, -int(q_cells[:, 0].max(initial=0))),
+                        min(reach, self.shape[0] - int(q_cells[:, 0].min(initial=0))) + 1):
+            for dy in range(max(-reach, -int(q_cells[:, 1].max(initial=0))),
+                            min(reach, self.shape[1] - int(q_cells[:, 1].min(initial=0))) + 1):
+                cx = q_cells[:, 0] + dx
+                cy = q_cells[:, 1] + dy
+                valid = (cx >= 0) & (cx < self.shape[0]) & (cy >= 0) & (cy < self.shape[1])
+                keys = cx * self.shape[1] + cy
+                lo = np.searchsorted(self.sorted_keys, keys, side='left')
+                hi = np.searchsorted(self.sorted_keys, keys, side='right')
+                counts = np.where(valid, hi - lo, 0)
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                rows_list.append(np.repeat(q_rows, counts))
+                cols_list.append(self.order[np.repeat(lo, counts) + offsets])
+        if not rows_list:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        rows = np.concatenate(rows_list)
+        cols = np.concatenate(cols_list)
+        diff = queries[rows] - self.points[cols]
+        distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        within = distances <= radius
+        return rows[within], cols[within], distances[within]
+
+
+def _keep_nearest(rows, cols, distances, k):
+    order = np.lexsort((distances, rows))
+    rows, cols, distances = rows[order], cols[order], distances[order]
+    first = np.ones(rows.shape[0], dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    starts = np.flatnonzero(first)
+    rank = np.arange(rows.shape[0]) - np.repeat(starts, np.diff(np.append(starts, rows.shape[0])))
+    keep = rank < k
+    return rows[keep], cols[keep], distances[keep]
+
+
+def gate_candidates(p1: np.ndarray, p2: np.ndarray, radius: float = None,
+                    k: int = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Candidate pairs (i, j) of objects i of p1 and j of p2 that are at most radius apart and/or among the k nearest
+    objects of p2 for i.
+    :return: rows, cols and distances of the candidate pairs
+    """
+    if radius is None and k is None:
+        raise ValueError('Either the gating radius or k has to be given')
+    n1, n2 = p1.shape[0], p2.shape[0]
+    if n1 == 0 or n2 == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+    if radius is not None:
+        index = GridIndex(p2, max(radius, 1e-9))
+        rows, cols, distances = index.query_radius(p1, radius)
+        if k is not None:
+            rows, cols, distances = _keep_nearest(rows, cols, distances, k)
+        return rows, cols, distances
+
+    # k nearest only, cells hold about k objects on average and the radius doubles for objects with fewer candidates
+    k = min(k, n2)
+    extent = np.ptp(np.asarray(p2, dtype=np.float64), axis=0)
+    cell_size = max(float(np.sqrt(max(extent[0], 1.0) * max(extent[1], 1.0) * k / n2)), 1.0)
+    index = GridIndex(p2, cell_size)
+    pending = np.arange(n1)
+    radius = cell_size
+    rows_list, cols_list, dist_list = [], [], []
+    while pending.shape[0] > 0:
+        rows, cols, distances = index.query_radius(p1[pending], radius)
+        done = np.bincount(rows, minlength=pending.shape[0]) >= k
+        selected = done[rows]
+        rows, cols, distances = _keep_nearest(rows[selected], cols[selected], distances[selected], k)
+        rows_list.append(pending[rows])
+        cols_list.append(cols)
+        dist_list.append(distances)
+        pending = pending[~done]
+        radius *= 2
+    return np.concatenate(rows_list), np.concatenate(cols_list), np.concatenate(dist_list)
+
+
+def perfect_matching(num_objects: int, rows: np.ndarray, cols: np.ndarray) -> Union[List[int], None]:
+    """
+    Perfect matching of the bipartite candidate graph, greedy start and BFS augmenting paths.
+    :return: matched col of every row or None if the candidate edges do not allow one
+    """
+    adjacency: List[List[int]] = [[] for _ in range(num_objects)]
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        adjacency[i].append(j)
+    row_of = [-1] * num_objects
+    col_of = [-1] * num_objects
+    for i in range(num_objects):
+        for j in adjacency[i]:
+            if row_of[j] < 0:
+                row_of[j], col_of[i] = i, j
+                break
+
+    for start in range(num_objects):
+        if col_of[start] >= 0:
+            continue
+        # BFS over rows, parent[j] is the row from which col j was reached
+        parent = {}
+        q = deque()
+        q.append(start)
+        free_col = -1
+        while len(q) > 0 and free_col < 0:
+            i = q.popleft()
+            for j in adjacency[i]:
+                if j in parent:
+                    continue
+                parent[j] = i
+                if row_of[j] < 0:
+                    free_col = j
+                    break
+                q.append(row_of[j])
+        if free_col < 0:
+            return None
+        j = free_col
+        while j >= 0:
+            i = parent[j]
+            previous = col_of[i]
+            row_of[j], col_of[i] = i, j
+            j = previous
+    return col_of
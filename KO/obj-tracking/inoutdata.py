@@ -1,6 +1,11 @@
-from typing import Dict, List
+import os
+import sys
+from typing import Dict, Iterator, List
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+import instancecache  # noqa: E402
+
 
 class InputData:
     def __init__(self, num_objects, num_frames):
@@ -8,34 +13,100 @@ class InputData:
         self.num_frames: int = num_frames
         self.frames: Dict[int, np.ndarray] = {}
 
-    def get_distance_matrix(self, f1: int, f2: int):
+    def get_distance_matrix(self, f1: int, f2: int, dtype=np.float64, chunk_size: int = None) -> np.ndarray:
         """
         Rows reference objects from f1, cols reference objects from f2
         :param f1:
         :param f2:
+        :param dtype: np.float32 halves the memory, np.float64 by default
+        :param chunk_size: number of rows computed at once, caps the temporary memory to chunk_size x num_objects x 2
         :return:
         """
-        distance_matrix = np.zeros((self.num_objects, self.num_objects))
-        f1_objects = self.frames[f1]
-        f2_objects = self.frames[f2]
-        for i in range(0, self.num_objects):
-            for j in range(0, self.num_objects):
-                distance_matrix[i, j] = np.linalg.norm(f1_objects[i] - f2_objects[j])
+        f1_objects = self.frames[f1].astype(dtype, copy=False)
+        f2_objects = self.frames[f2].astype(dtype, copy=False)
+        chunk_size = chunk_size or self.num_objects
+        distance_matrix = np.empty((self.num_objects, self.num_objects), dtype=dtype)
+        for start in range(0, self.num_objects, chunk_size):
+            diff = f1_objects[start:start + chunk_size, np.newaxis, :] - f2_objects[np.newaxis, :, :]
+            np.sqrt(np.einsum('ijk,ijk->ij', diff, diff), out=distance_matrix[start:start + chunk_size])
         return distance_matrix
 
 
-def read_input(path: str) -> InputData:
+def _parse_frame(line: str) -> np.ndarray:
+    positions = [int(x) for x in line.split()]
+    x_pos = positions[::2]
+    y_pos = positions[1::2]
+    return np.array([x_pos, y_pos]).T
+
+
+def read_input(path: str, use_cache=False) -> InputData:
+    """
+    :param use_cache: keep the frames in the instancecache, later runs on the same file memory-map them
+    """
+    if use_cache:
+        positions = instancecache.load(path, 'tracking-1', _parse_positions)['positions']
+        input_data = InputData(positions.shape[1], positions.shape[0])
+        for frame in range(positions.shape[0]):
+            input_data.frames[frame] = positions[frame]
+        return input_data
     with open(path, 'r') as f:
         num_objects, num_frames = [int(x) for x in f.readline().split()]
         input_data = InputData(num_objects, num_frames)
         for frame in range(num_frames):
-            positions = [int(x) for x in f.readline().split()]
-            x_pos = positions[::2]
-            y_pos = positions[1::2]
-            input_data.frames[frame] = np.array([x_pos, y_pos]).T
+            input_data.frames[frame] = _parse_frame(f.readline())
     return input_data
 
 
+def _parse_positions(path: str) -> Dict[str, np.ndarray]:
+    with open(path, 'r') as f:
+        num_objects, num_frames = [int(x) for x in f.readline().split()]
+    positions = np.empty((num_frames, num_objects, 2), dtype=np.int64)
+    for frame, frame_positions in enumerate(_iter_frames(path)):
+        positions[frame] = frame_positions
+    return {'positions': positions}
+
+
+def _iter_frames(path: str) -> Iterator[np.ndarray]:
+    if path.endswith('.npy'):
+        positions = np.load(path, mmap_mode='r')
+        for frame in range(positions.shape[0]):
+            yield np.asarray(positions[frame])
+        return
+    with open(path, 'r') as f:
+        num_objects, num_frames = [int(x) for x in f.readline().split()]
+        for frame in range(num_frames):
+            yield _parse_frame(f.readline()).reshape(num_objects, 2)
+
+
+def iter_frame_pairs(path: str) -> Iterator[InputData]:
+    """
+    Streams consecutive frame pairs, only two frames are held in memory at a time
+    :param path: text input or the .npy file written by convert_to_binary, which is memory-mapped
+    :return: InputData of every pair with the earlier frame as frame 0 and the later one as frame 1
+    """
+    previous = None
+    for positions in _iter_frames(path):
+        if previous is not None:
+            pair = InputData(positions.shape[0], 2)
+            pair.frames[0] = previous
+            pair.frames[1] = positions
+            yield pair
+        previous = positions
+
+
+def convert_to_binary(in_path: str, out_path: str):
+    """
+    Writes the text input as a num_frames x num_objects x 2 int64 .npy array, frame by frame
+    """
+    with open(in_path, 'r') as f:
+        num_objects, num_frames = [int(x) for x in f.readline().split()]
+    positions = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.int64, shape=(num_frames, num_objects, 2))
+    for frame, frame_positions in enumerate(_iter_frames(in_path)):
+        positions[frame] = frame_positions
+    positions.flush()
+    del positions
+
+
 def save_output(data: List[List[int]], path: str):
     with open(path, 'w') as f:
         for i, line in enumerate(data):
@@ -43,3 +114,28 @@ def save_output(data: List[List[int]], path: str):
             f.write(line_str)
             if i + 1 != len(data):
                 f.write('\n')
+
+
+class OutputWriter:
+    """
+    Writes the mappings one by one in the format of save_output, usage:
+    with OutputWriter(path) as writer:
+        writer.write(mapping)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.f = None
+        self.num_lines = 0
+
+    def __enter__(self) -> 'OutputWriter':
+        self.f = open(self.path, 'w')
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.f.close()
+
+    def write(self, line: List[int]):
+        if self.num_lines > 0:
+            self.f.write('\n')
+        self.f.write(' '.join([str(x) for x in line]))
+        self.num_lines += 1
@@ -1,20 +1,134 @@
 #!/usr/bin/env python3
-import sys
-from typing import List
-from inoutdata import InputData, read_input, save_output
-from mincostflow import build_mincost_graph, minimize_cost, get_obj_mapping
+import argparse
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator, List, Tuple
+import numpy as np
+from assignment import ASSIGNMENT_ENGINES
+from engines import ENGINES
+from inoutdata import InputData, OutputWriter, iter_frame_pairs, read_input, save_output
+from mincostflow import build_mincost_graph, minimize_cost, get_obj_mapping, warm_start_potential
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('in_path')
+    parser.add_argument('out_path')
+    parser.add_argument('--engine', default='cycle-cancelling',
+                        choices=('cycle-cancelling',) + tuple(ENGINES.keys()) + tuple(ASSIGNMENT_ENGINES.keys()),
+                        help='min-cost flow algorithm, hungarian and auction solve the assignment problem on the '
+                             'distance matrix without building the flow graph')
+    parser.add_argument('--k-nearest', type=int, default=None,
+                        help='connect every object only to its k nearest objects of the next frame')
+    parser.add_argument('--radius', type=float, default=None,
+                        help='connect every object only to the objects of the next frame within the radius, '
+                             'the graph falls back to all edges if no assignment is possible')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes solving the frame pairs, the frames are shared through shared memory')
+    parser.add_argument('--stream', action='store_true',
+                        help='read the frames pair by pair and write every mapping once it is solved, in_path can '
+                             'also be a .npy file written by inoutdata.convert_to_binary')
+    parser.add_argument('--warm-start', action='store_true',
+                        help='seed every frame pair with the mapping of the previous one, the ssp engine also reuses '
+                             'its potentials')
+    parser.add_argument('--cache', action='store_true',
+                        help='keep the parsed input in the instance cache ($KO_CACHE_DIR), not used with --stream')
+    args = parser.parse_args()
+    if (args.k_nearest is not None or args.radius is not None) and args.engine in ASSIGNMENT_ENGINES:
+        parser.error('--k-nearest and --radius need a min-cost flow engine')
+    if args.stream and args.workers > 1:
+        parser.error('--stream can not be combined with --workers')
+    if args.warm_start and (args.workers > 1 or args.engine not in ('cycle-cancelling', 'ssp')):
+        parser.error('--warm-start needs --workers 1 and the cycle-cancelling or ssp engine')
+    return args
+
+
+def solve_frame_pair(input_data: InputData, frame: int, engine, k_nearest=None, radius=None) -> List[int]:
+    if engine in ASSIGNMENT_ENGINES:
+        assignment = ASSIGNMENT_ENGINES[engine](input_data.get_distance_matrix(frame, frame + 1))
+        return [int(j) + 1 for j in assignment]
+    g = build_mincost_graph(input_data, frame, frame + 1, k_nearest, radius)
+    minimize_cost(g, engine)
+    return get_obj_mapping(g)
+
+
+def solve_sequence(pairs: Iterable[Tuple[InputData, int]], engine, k_nearest=None, radius=None,
+                   warm_start=False) -> Iterator[List[int]]:
+    """
+    Solves the frame pairs one after another
+    :param pairs: input data and the index of the first frame of every pair, in frame order
+    :param warm_start: seed every pair with the mapping of the previous one, the ssp engine starts from the potentials
+                       of the previous pair
+    """
+    if not warm_start:
+        for input_data, frame in pairs:
+            yield solve_frame_pair(input_data, frame, engine, k_nearest, radius)
+        return
+    previous, potential, seed = None, None, None
+    for input_data, frame in pairs:
+        g = build_mincost_graph(input_data, frame, frame + 1, k_nearest, radius, seed)
+        if engine == 'ssp':
+            potential = warm_start_potential(g, previous, potential)
+            minimize_cost(g, engine, potential)
+        else:
+            minimize_cost(g, engine)
+        mapping = get_obj_mapping(g)
+        yield mapping
+        previous, seed = g, [j - 1 for j in mapping]
+
+
+# state of a worker process, set by _init_worker
+_worker = {}
+
+
+def _init_worker(shm_name, shape, dtype, solve_args):
+    shm = SharedMemory(name=shm_name)
+    positions = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    input_data = InputData(shape[1], shape[0])
+    for frame in range(shape[0]):
+        input_data.frames[frame] = positions[frame]
+    # the shared memory has to stay referenced for the lifetime of the worker
+    _worker.update(shm=shm, input_data=input_data, solve_args=solve_args)
+
+
+def _solve_in_worker(frame: int) -> List[int]:
+    return solve_frame_pair(_worker['input_data'], frame, *_worker['solve_args'])
+
+
+def solve_parallel(input_data: InputData, workers: int, engine, k_nearest=None, radius=None) -> List[List[int]]:
+    """
+    Solves the frame pairs in a process pool, the mappings are returned in frame order
+    """
+    positions = np.stack([input_data.frames[f] for f in range(input_data.num_frames)])
+    shm = SharedMemory(create=True, size=max(positions.nbytes, 1))
+    shared = np.ndarray(positions.shape, dtype=positions.dtype, buffer=shm.buf)
+    try:
+        shared[:] = positions
+        num_pairs = input_data.num_frames - 1
+        with Pool(workers, initializer=_init_worker,
+                  initargs=(shm.name, positions.shape, positions.dtype.str, (engine, k_nearest, radius))) as pool:
+            return list(pool.imap(_solve_in_worker, range(num_pairs), chunksize=max(1, num_pairs // (workers * 8))))
+    finally:
+        del shared
+        shm.close()
+        shm.unlink()
 
 
 def main():
-    in_path = sys.argv[1]
-    out_path = sys.argv[2]
-    input_data: InputData = read_input(in_path)
-    out_data: List[List[int]] = []
-    for frame in range(0, input_data.num_frames - 1):
-        g = build_mincost_graph(input_data, frame, frame + 1)
-        minimize_cost(g)
-        out_data.append(get_obj_mapping(g))
-    save_output(out_data, out_path)
+    args = parse_args()
+    if args.stream:
+        with OutputWriter(args.out_path) as writer:
+            pairs = ((pair, 0) for pair in iter_frame_pairs(args.in_path))
+            for mapping in solve_sequence(pairs, args.engine, args.k_nearest, args.radius, args.warm_start):
+                writer.write(mapping)
+        return
+    input_data: InputData = read_input(args.in_path, args.cache)
+    if args.workers > 1:
+        out_data = solve_parallel(input_data, args.workers, args.engine, args.k_nearest, args.radius)
+    else:
+        pairs = ((input_data, frame) for frame in range(0, input_data.num_frames - 1))
+        out_data = list(solve_sequence(pairs, args.engine, args.k_nearest, args.radius, args.warm_start))
+    save_output(out_data, args.out_path)
 
 
 if __name__ == '__main__':
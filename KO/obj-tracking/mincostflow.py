@@ -1,6 +1,8 @@
 from graphv2 import Graph, Node, Edge
 from typing import List, Dict, Union
 from inoutdata import InputData
+from engines import ENGINES, EPS
+import gating
 from collections import deque
 import copy
 import sys
@@ -67,7 +69,17 @@ def get_obj_mapping(g: MinCostGraph) -> List[int]:
     return mappings
 
 
-def build_mincost_graph(data: InputData, f1_index, f2_index):
+def build_mincost_graph(data: InputData, f1_index, f2_index, k_nearest: int = None, radius: float = None,
+                        seed: List[int] = None):
+    """
+    :param seed: initial mapping, seed[i] is the object of f2 (starting from 0) that gets the flow of object i of f1,
+                 the identity by default
+    :param k_nearest: connect every l1 node only to its k nearest l2 nodes
+    :param radius: connect every l1 node only to the l2 nodes at most radius away, combined with k_nearest both
+                   conditions have to hold
+    With gating the initial flow follows a perfect matching of the gated edges, if there is none the graph falls back
+    to all l1 x l2 edges.
+    """
     g = MinCostGraph()
     g.add_node_by_type('source')
     g.add_node_by_type('sink')
@@ -77,14 +89,104 @@ def build_mincost_graph(data: InputData, f1_index, f2_index):
         node_l2 = g.add_node_by_type('l2')
         g.add_forward_edge(node_l2, g.sink_node, lb=1, ub=1, cost=0, flow=1)
 
+    if k_nearest is not None or radius is not None:
+        rows, cols, distances = gating.gate_candidates(data.frames[f1_index], data.frames[f2_index], radius, k_nearest)
+        if seed is not None and set(zip(rows.tolist(), cols.tolist())).issuperset(enumerate(seed)):
+            matching = seed
+        else:
+            matching = gating.perfect_matching(data.num_objects, rows, cols)
+        if matching is not None:
+            for i, j, dist in zip(rows.tolist(), cols.tolist(), distances.tolist()):
+                flow = 1 if matching[i] == j else 0
+                g.add_forward_edge(g.l1_nodes[i], g.l2_nodes[j], lb=0, ub=1, cost=dist, flow=flow)
+            return g
+    seed = seed if seed is not None else range(data.num_objects)
     distance_matrix = data.get_distance_matrix(f1_index, f2_index)
     for i in range(data.num_objects):
         for j in range(data.num_objects):
-            flow = 1 if i == j else 0
+            flow = 1 if seed[i] == j else 0
             g.add_forward_edge(g.l1_nodes[i], g.l2_nodes[j], lb=0, ub=1, cost=distance_matrix[i][j], flow=flow)
     return g
 
 
+class LayeredMinCostGraph(MinCostGraph):
+    """
+    One network over consecutive frames: source -> frame nodes -> ... -> sink. Every object is split into an in and
+    an out node joined by an edge with lb = ub = 1, so each object takes exactly one track, and the out nodes of a
+    frame connect to the in nodes of the next one with the distances as costs.
+    """
+    def __init__(self, first_frame: int):
+        super(LayeredMinCostGraph, self).__init__()
+        self.first_frame = first_frame
+        self.in_nodes: List[List[Node]] = []
+        self.out_nodes: List[List[Node]] = []
+        self.object_index: Dict[int, int] = {}
+
+    def add_layer(self, num_objects):
+        in_layer, out_layer = [], []
+        for i in range(num_objects):
+            node_in, node_out = self.add_node(), self.add_node()
+            self.add_forward_edge(node_in, node_out, lb=1, ub=1, cost=0, flow=1)
+            self.object_index[node_in.id] = i
+            in_layer.append(node_in)
+            out_layer.append(node_out)
+        self.in_nodes.append(in_layer)
+        self.out_nodes.append(out_layer)
+
+
+def build_layered_graph(data: InputData, first_frame, last_frame) -> LayeredMinCostGraph:
+    """
+    Layered network of the frames first_frame..last_frame (inclusive), the initial flow is the identity mapping
+    """
+    g = LayeredMinCostGraph(first_frame)
+    g.add_node_by_type('source')
+    g.add_node_by_type('sink')
+    for frame in range(first_frame, last_frame + 1):
+        g.add_layer(data.num_objects)
+    for node in g.in_nodes[0]:
+        g.add_forward_edge(g.source_node, node, lb=1, ub=1, cost=0, flow=1)
+    for node in g.out_nodes[-1]:
+        g.add_forward_edge(node, g.sink_node, lb=1, ub=1, cost=0, flow=1)
+    for layer, frame in enumerate(range(first_frame, last_frame)):
+        distance_matrix = data.get_distance_matrix(frame, frame + 1)
+        for i, node_out in enumerate(g.out_nodes[layer]):
+            for j, node_in in enumerate(g.in_nodes[layer + 1]):
+                flow = 1 if i == j else 0
+                g.add_forward_edge(node_out, node_in, lb=0, ub=1, cost=distance_matrix[i][j], flow=flow)
+    return g
+
+
+def get_layered_mappings(g: LayeredMinCostGraph) -> List[List[int]]:
+    """
+    :return: mapping of every frame pair of g in the format of get_obj_mapping
+    """
+    mappings = []
+    for layer in g.out_nodes[:-1]:
+        mapping = []
+        for node in layer:
+            for e in node.out_edges.values():
+                if e.flow == 1:
+                    mapping.append(g.object_index[e.dst.id] + 1)
+        mappings.append(mapping)
+    return mappings
+
+
+def solve_global(data: InputData, engine='ssp', window: int = None) -> List[List[int]]:
+    """
+    Tracks the whole sequence with one min-cost flow, or one per window of the given number of frames, consecutive
+    windows share their border frame
+    """
+    window = window or data.num_frames
+    if window < 2:
+        raise ValueError('The window has to span at least two frames')
+    mappings = []
+    for first_frame in range(0, data.num_frames - 1, window - 1):
+        g = build_layered_graph(data, first_frame, min(first_frame + window - 1, data.num_frames - 1))
+        minimize_cost(g, engine)
+        mappings.extend(get_layered_mappings(g))
+    return mappings
+
+
 def remove_edges_with_zero_lb(g: MinCostGraph):
     for e in list(g.edge_dict.values()):
         if e.ub == 0:
@@ -142,6 +244,97 @@ def bellman_ford_negative_cycle(g: MinCostGraph) -> Union[List[Edge], None]:
     return _edges_from_path(path)
 
 
+class ResidualArcs:
+    """
+    Residual network of g stored in flat lists, allocated once. Arc 2k follows the k-th edge of g with capacity
+    ub - flow, arc 2k + 1 goes against it with capacity flow - lb and the negated cost. Cancelling a cycle only moves
+    capacity between the arcs and their twins, arcs with zero capacity are skipped by the search.
+    """
+    def __init__(self, g: MinCostGraph):
+        self.edges = list(g.edge_dict.values())
+        self.num_nodes = max(g.node_dict.keys()) + 1
+        self.head: List[int] = []
+        self.cap: List[int] = []
+        self.cost: List[float] = []
+        self.out_arcs: List[List[int]] = [[] for _ in range(self.num_nodes)]
+        for e in self.edges:
+            self.out_arcs[e.src.id].append(len(self.head))
+            self.head.append(e.dst.id)
+            self.cap.append(e.ub - e.flow)
+            self.cost.append(e.cost)
+            self.out_arcs[e.dst.id].append(len(self.head))
+            self.head.append(e.src.id)
+            self.cap.append(e.flow - e.lb)
+            self.cost.append(-e.cost)
+
+    def negative_cycle(self) -> Union[List[int], None]:
+        """
+        Queue based Bellman-Ford (SPFA) started from all nodes at distance 0, so no dummy source is needed. After every
+        num_nodes relaxations the parent pointers are searched for a cycle, which is always negative. Stops as soon as
+        no distance changes.
+        :return: arcs of a negative cycle in cycle order
+        """
+        head, cap, cost = self.head, self.cap, self.cost
+        n = self.num_nodes
+        distances = [0.0] * n
+        parent = [-1] * n
+        q = deque(range(n))
+        in_queue = [True] * n
+        relaxations = 0
+        while len(q) > 0:
+            v = q.popleft()
+            in_queue[v] = False
+            dist = distances[v]
+            for a in self.out_arcs[v]:
+                w = head[a]
+                if cap[a] <= 0 or dist + cost[a] >= distances[w] - EPS:
+                    continue
+                distances[w] = dist + cost[a]
+                parent[w] = a
+                relaxations += 1
+                if relaxations % n == 0:
+                    cycle = self._parent_cycle(parent)
+                    if cycle is not None:
+                        return cycle
+                if not in_queue[w]:
+                    in_queue[w] = True
+                    q.append(w)
+        return None
+
+    def _parent_cycle(self, parent: List[int]) -> Union[List[int], None]:
+        """
+        Walks from every node to the root of its parent pointer tree, a node met twice on one walk lies on a cycle
+        """
+        walk_of = [-1] * self.num_nodes
+        for start in range(self.num_nodes):
+            v = start
+            while parent[v] >= 0 and walk_of[v] < 0:
+                walk_of[v] = start
+                v = self.head[parent[v] ^ 1]
+            if walk_of[v] == start and parent[v] >= 0:
+                cycle = []
+                u = v
+                while True:
+                    a = parent[u]
+                    cycle.append(a)
+                    u = self.head[a ^ 1]
+                    if u == v:
+                        break
+                cycle.reverse()
+                return cycle
+        return None
+
+    def cancel(self, cycle: List[int]):
+        capacity = min([self.cap[a] for a in cycle])
+        for a in cycle:
+            self.cap[a] -= capacity
+            self.cap[a ^ 1] += capacity
+
+    def write_back(self):
+        for k, e in enumerate(self.edges):
+            e.flow = e.ub - self.cap[2 * k]
+
+
 def _edges_from_path(path: deque) -> List[Edge]:
     src_node = path.popleft()
     edges = []
@@ -156,11 +349,35 @@ def _edges_from_path(path: deque) -> List[Edge]:
         return edges
 
 
-def minimize_cost(g: MinCostGraph):
+def minimize_cost(g: MinCostGraph, engine='cycle-cancelling', potential: List[float] = None, cycle_finder='spfa'):
     """
-    Cycle cancelling algorithm, main loop
-    :return:
+    Minimises the cost of the current (feasible) flow of g in place. 'cycle-cancelling' cancels negative cycles of
+    the residual network, the engines of engines.ENGINES (ssp, network-simplex) solve the same problem on arrays with
+    the node balances of the flow and write the optimal flow back to g.
+    :param engine: 'cycle-cancelling' or one of engines.ENGINES
+    :param potential: warm start of the 'ssp' engine, node potentials indexed by node id (see warm_start_potential),
+                      updated in place to the optimal ones
+    :param cycle_finder: only used by 'cycle-cancelling', 'spfa' cancels the cycles on ResidualArcs, 'bellman-ford' is
+                         the original routine on a residual copy of the graph, cross-checked by compare_engines.py
     """
+    if engine != 'cycle-cancelling':
+        _minimize_cost_engine(g, engine, potential)
+        return
+    if cycle_finder == 'bellman-ford':
+        _minimize_cost_bellman_ford(g)
+        return
+    if cycle_finder != 'spfa':
+        raise ValueError(f'Unknown cycle finder: {cycle_finder}')
+    residual = ResidualArcs(g)
+    while True:
+        cycle = residual.negative_cycle()
+        if cycle is None:
+            break
+        residual.cancel(cycle)
+    residual.write_back()
+
+
+def _minimize_cost_bellman_ford(g: MinCostGraph):
     g_res = build_residual_graph(g)
     cntr = 0
     while True:
@@ -189,3 +406,44 @@ def minimize_cost(g: MinCostGraph):
             else:
                 e.reverse.ub = e.reverse.ub + capacity
         cntr += 1
+
+
+def _minimize_cost_engine(g: MinCostGraph, engine, potential: List[float] = None):
+    edges = list(g.edge_dict.values())
+    num_nodes = max(g.node_dict.keys()) + 1
+    supply = [0] * num_nodes
+    for e in edges:
+        supply[e.src.id] += e.flow
+        supply[e.dst.id] -= e.flow
+    args = (num_nodes, [e.src.id for e in edges], [e.dst.id for e in edges], [e.lb for e in edges],
+            [e.ub for e in edges], [e.cost for e in edges], supply)
+    if potential is not None:
+        if engine != 'ssp':
+            raise ValueError(f'Engine {engine} does not support warm start potentials')
+        flow = ENGINES[engine](*args, flow=[e.flow for e in edges], potential=potential)
+    else:
+        flow = ENGINES[engine](*args)
+    for e, f in zip(edges, flow):
+        e.flow = f
+
+
+def get_total_cost(g: MinCostGraph) -> float:
+    return sum([e.cost * e.flow for e in g.edge_dict.values()])
+
+
+def warm_start_potential(g: MinCostGraph, previous: MinCostGraph = None,
+                         previous_potential: List[float] = None) -> List[float]:
+    """
+    Potentials for the ssp engine on g from the optimal ones of the previous frame pair. The objects of the shared
+    frame are l2 nodes of previous and l1 nodes of g, so they keep their potential. Every l2 node of g gets the
+    largest potential with non-negative reduced costs of all its edges, so the ssp engine only has to reroute the
+    flow of the (seeded) edges that are not tight.
+    :return: potentials indexed by node id
+    """
+    potential = [0.0] * (max(g.node_dict.keys()) + 1)
+    if previous is not None:
+        for node, previous_node in zip(g.l1_nodes, previous.l2_nodes):
+            potential[node.id] = previous_potential[previous_node.id]
+    for node in g.l2_nodes:
+        potential[node.id] = min([potential[e.src.id] + e.cost for e in node.in_edges.values()])
+    return potential
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
+import argparse
+import os
 import sys
-import gurobipy as grb
 from typing import List
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+import milpmodel  # noqa: E402
+
 
 class InputData:
     def __init__(self):
@@ -57,41 +61,50 @@ def get_output(x, data: InputData):
     return num_produced
 
 
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input_path')
+    parser.add_argument('output_path')
+    parser.add_argument('--solver', choices=milpmodel.BACKENDS, default='gurobi', help='MILP backend')
+    return parser.parse_args()
+
+
 def main():
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
+    args = parse_args()
+    input_path, output_path = args.input_path, args.output_path
     data = read_input(input_path)
-    model: grb.Model = grb.Model()
-    x: grb.tupledict = model.addVars(data.num_machines, data.num_prod_type, vtype=grb.GRB.INTEGER, name='x')
-    z = model.addVar(name='obj', vtype=grb.GRB.INTEGER)
-    k = model.addVars(data.num_prod_type, lb=0, name='aux_var', vtype=grb.GRB.INTEGER)
+    model = milpmodel.create_model(args.solver)
+    x = model.addVars(data.num_machines, data.num_prod_type, vtype=milpmodel.INTEGER, name='x')
+    z = model.addVar(name='obj', vtype=milpmodel.INTEGER)
+    k = model.addVars(data.num_prod_type, lb=0, name='aux_var', vtype=milpmodel.INTEGER)
 
-    model.addConstr(grb.quicksum(x[0, j] * data.prod_times[0][j] - x[3, j] * data.prod_times[3][j]
-                                 for j in range(data.num_prod_type)) <= z, name='obj_constr_1')
-    model.addConstr(grb.quicksum(x[3, j] * data.prod_times[3][j] - x[0, j] * data.prod_times[0][j]
-                                 for j in range(data.num_prod_type)) <= z, name='obj_constr_1')
+    model.addConstr(model.quicksum(x[0, j] * data.prod_times[0][j] - x[3, j] * data.prod_times[3][j]
+                                   for j in range(data.num_prod_type)) <= z, name='obj_constr_1')
+    model.addConstr(model.quicksum(x[3, j] * data.prod_times[3][j] - x[0, j] * data.prod_times[0][j]
+                                   for j in range(data.num_prod_type)) <= z, name='obj_constr_1')
 
     model.addConstr(z >= 0)
     for j in range(data.num_prod_type):
-        model.addConstr(grb.quicksum(x[i, j] for i in range(data.num_machines)) >= data.num_of_produced_prods[j],
+        model.addConstr(model.quicksum(x[i, j] for i in range(data.num_machines)) >= data.num_of_produced_prods[j],
                         name=f'produced_prod_{j}')
 
     for i in range(data.num_machines):
-        model.addConstr(grb.quicksum(x[i, j] for j in range(data.num_prod_type)) <= data.total_num_prods_on_machine[i],
-                        name=f'on_machine_{i}')
+        model.addConstr(model.quicksum(x[i, j] for j in range(data.num_prod_type)) <=
+                        data.total_num_prods_on_machine[i], name=f'on_machine_{i}')
 
-    model.addConstr(grb.quicksum(data.costs[i][j] * x[i, j] for i in range(data.num_machines)
-                                 for j in range(data.num_prod_type)) <= data.total_cost, name='total_cost')
+    model.addConstr(model.quicksum(data.costs[i][j] * x[i, j] for i in range(data.num_machines)
+                                   for j in range(data.num_prod_type)) <= data.total_cost, name='total_cost')
 
-    model.addConstr(grb.quicksum(x[1, j] * data.costs[1][j] + x[3, j] * data.costs[3][j]
-                                  for j in range(data.num_prod_type)) <= data.cost_24, name='cost_24')
+    model.addConstr(model.quicksum(x[1, j] * data.costs[1][j] + x[3, j] * data.costs[3][j]
+                                   for j in range(data.num_prod_type)) <= data.cost_24, name='cost_24')
 
     model.addConstrs((x[3, j] == 6 * k[j] for j in range(data.num_prod_type)), name='batch')
 
-    model.setObjective(z, grb.GRB.MINIMIZE)
+    model.setObjective(z, milpmodel.MINIMIZE)
     model.optimize()
-    model.display()
-    if model.Status == 3:
+    if args.solver == 'gurobi':
+        model.display()
+    if model.Status == milpmodel.INFEASIBLE:
         produced = [-1]
         save_output(output_path, -1, produced)
     else:
@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
+import argparse
+import os
 import sys
-import gurobipy as grb
-from typing import Tuple, List
+import numpy as np
+from typing import Dict, Tuple, List
+
+import scheduling
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'common'))
+import instancecache  # noqa: E402
+import milpmodel  # noqa: E402
 
 
 class InputData:
@@ -38,6 +46,45 @@ class InputData:
                     mutually_exclusive_tasks.append((i, k, j, z))
         return mutually_exclusive_tasks
 
+    def exclusive_pairs(self):
+        """
+        Tasks of the same bureaucrat, every unordered pair once
+        """
+        pairs = []
+        for b in range(self.b_size):
+            tasks = self.get_bur_tasks(b)
+            for n, (i, k) in enumerate(tasks):
+                for j, z in tasks[n + 1:]:
+                    pairs.append((i, k, j, z))
+        return pairs
+
+    def heads(self) -> Dict[Tuple[int, int], int]:
+        """
+        Earliest start of every task, after the previous tasks of the citizen
+        """
+        return {(i, k): sum(self.durations[i][:k]) for i in range(self.c_size)
+                for k in range(self.get_citizen_num_tasks(i))}
+
+    def tails(self) -> Dict[Tuple[int, int], int]:
+        """
+        Work of the citizen left after every task
+        """
+        return {(i, k): sum(self.durations[i][k + 1:]) for i in range(self.c_size)
+                for k in range(self.get_citizen_num_tasks(i))}
+
+    def makespan_lower_bound(self) -> int:
+        """
+        Longest citizen, or the load of a bureaucrat with the shortest head before and the shortest tail after it
+        """
+        heads, tails = self.heads(), self.tails()
+        bound = max([sum(self.durations[i]) for i in range(self.c_size)], default=0)
+        for b in range(self.b_size):
+            tasks = self.get_bur_tasks(b)
+            if tasks:
+                bound = max(bound, min([heads[t] for t in tasks]) + sum([self.get_d(i, k) for i, k in tasks]) +
+                            min([tails[t] for t in tasks]))
+        return bound
+
     @property
     def list_of_tasks(self):
         return [t for b in range(self.b_size) for t in self.get_bur_tasks(b)]
@@ -52,7 +99,12 @@ class InputData:
         return string
 
 
-def read_data(path) -> InputData:
+def read_data(path, use_cache=False) -> InputData:
+    """
+    :param use_cache: keep the tasks in the instancecache, later runs on the same file memory-map them
+    """
+    if use_cache:
+        return _data_from_arrays(instancecache.load(path, 'bureaucracy-1', _parse_arrays))
     with open(path, 'r') as f:
         c_size, b_size = f.readline().split()
         c_size, b_size = int(c_size), int(b_size)
@@ -66,32 +118,76 @@ def read_data(path) -> InputData:
     return data
 
 
-def get_bur_policy(var, bur_tasks):
-    tasks = [{'idx': (i, k), 'val': var[i, k].x} for i, k in bur_tasks]
+def _parse_arrays(path) -> Dict[str, np.ndarray]:
+    with open(path, 'r') as f:
+        c_size, b_size = [int(x) for x in f.readline().split()]
+        num_tasks, tasks = [], []
+        for i in range(c_size):
+            line_list = [int(x) for x in f.readline().split()]
+            num_tasks.append(len(line_list) // 2)
+            tasks.extend(line_list)
+    tasks = np.array(tasks, dtype=np.int64).reshape(-1, 2)
+    return dict(sizes=np.array([c_size, b_size]), num_tasks=np.array(num_tasks, dtype=np.int64),
+                bureaucrats=tasks[:, 0], durations=tasks[:, 1])
+
+
+def _data_from_arrays(arrays: Dict[str, np.ndarray]) -> InputData:
+    c_size, b_size = arrays['sizes'].tolist()
+    data = InputData(b_size, c_size)
+    bureaucrats, durations = arrays['bureaucrats'].tolist(), arrays['durations'].tolist()
+    t = 0
+    for i, num_tasks in enumerate(arrays['num_tasks'].tolist()):
+        for k in range(num_tasks):
+            data.add_task(i, k, bureaucrats[t], durations[t])
+            t += 1
+    return data
+
+
+def get_bur_policy(start: Dict[Tuple[int, int], float], bur_tasks):
+    tasks = [{'idx': (i, k), 'val': start[i, k]} for i, k in bur_tasks]
     tasks.sort(key=lambda x: x['val'])
     return [str(x['idx'][0]) for x in tasks]
 
 
-def save_solution(path, var, data: InputData, max_tf_val):
+def save_solution(path, start: Dict[Tuple[int, int], float], data: InputData, max_tf_val):
     with open(path, 'w') as f:
         f.write(str(max_tf_val))
         f.write('\n')
         for b in range(data.b_size):
-            b_policy = get_bur_policy(var, data.get_bur_tasks(b))
+            b_policy = get_bur_policy(start, data.get_bur_tasks(b))
             f.write(' '.join(b_policy))
             f.write('\n')
 
 
-def main():
-    input_file_path = sys.argv[1]
-    output_file_path = sys.argv[2]
-    data = read_data(input_file_path)
-    model = grb.Model()
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input_file_path')
+    parser.add_argument('output_file_path')
+    parser.add_argument('--cache', action='store_true',
+                        help='keep the parsed input in the instance cache ($KO_CACHE_DIR)')
+    parser.add_argument('--solver', choices=milpmodel.BACKENDS, default='gurobi', help='MILP backend')
+    parser.add_argument('--heuristic', action='store_true',
+                        help='save the list scheduling and tabu search schedule without solving the MIP')
+    parser.add_argument('--no-mip-start', action='store_true',
+                        help='solve the MIP without the heuristic schedule as start and makespan bound')
+    parser.add_argument('--tabu-iterations', type=int, default=2000)
+    parser.add_argument('--tabu-time', type=float, default=None, help='time limit of the tabu search in seconds')
+    parser.add_argument('--formulation', choices=('reduced', 'ordered'), default='reduced',
+                        help='reduced has one binary per unordered pair of tasks of a bureaucrat with big-Ms from the '
+                             'heads and tails of the tasks, ordered one per ordered pair with the same M everywhere')
+    return parser.parse_args()
+
+
+def build_ordered_model(model: milpmodel.Model, data: InputData, M):
+    """
+    :param M: upper bound of the makespan
+    :return: start times, makespan, the binaries of the task pairs, 1 if the second task goes first, and the pairs
+    """
     mutually_exclusive_tasks = data.mutually_exclusive_tasks()
     # ADD VARIABLES
-    start_t = model.addVars(data.list_of_tasks, vtype=grb.GRB.INTEGER, name='start_t')
-    max_tf = model.addVar(vtype=grb.GRB.INTEGER, obj=1, name='max_tf')
-    bur_busy = model.addVars(mutually_exclusive_tasks, vtype=grb.GRB.BINARY)
+    start_t = model.addVars(data.list_of_tasks, vtype=milpmodel.INTEGER, name='start_t')
+    max_tf = model.addVar(ub=M, vtype=milpmodel.INTEGER, obj=1, name='max_tf')
+    bur_busy = model.addVars(mutually_exclusive_tasks, vtype=milpmodel.BINARY)
     # ADD CONSTRAINTS
     model.addConstrs(max_tf >= start_t[i, k] + data.get_d(i, k) for i, k in data.list_of_tasks)
     # order of tasks
@@ -101,11 +197,72 @@ def main():
                             name=f'[{i},{k}] after [{i},{k - 1}]')
     # same bureaucrat can not work on several tasks at once
     for i, k, j, z in mutually_exclusive_tasks:
-        model.addConstr(start_t[i, k] + data.get_d(i, k) <= start_t[j, z] + data.M * bur_busy[i, k, j, z])
-        model.addConstr(start_t[j, z] + data.get_d(j, z) <= start_t[i, k] + data.M * (1 - bur_busy[i, k, j, z]))
+        model.addConstr(start_t[i, k] + data.get_d(i, k) <= start_t[j, z] + M * bur_busy[i, k, j, z])
+        model.addConstr(start_t[j, z] + data.get_d(j, z) <= start_t[i, k] + M * (1 - bur_busy[i, k, j, z]))
+    return start_t, max_tf, bur_busy, mutually_exclusive_tasks
+
+
+def build_reduced_model(model: milpmodel.Model, data: InputData, M):
+    """
+    Every task starts between its head and M minus its duration and tail, which bounds the difference of the end of
+    one task and the start of another, the big-M of their disjunction. Only the last task of a citizen bounds the
+    makespan.
+    :param M: upper bound of the makespan
+    :return: start times, makespan, the binaries of the task pairs, 1 if the second task goes first, and the pairs
+    """
+    heads, tails = data.heads(), data.tails()
+    pairs = data.exclusive_pairs()
+    # ADD VARIABLES
+    start_t = {(i, k): model.addVar(lb=heads[i, k], ub=M - data.get_d(i, k) - tails[i, k], vtype=milpmodel.INTEGER,
+                                    name=f'start_t[{i},{k}]') for i, k in data.list_of_tasks}
+    max_tf = model.addVar(lb=data.makespan_lower_bound(), ub=M, vtype=milpmodel.INTEGER, obj=1, name='max_tf')
+    bur_busy = model.addVars(pairs, vtype=milpmodel.BINARY)
+    # ADD CONSTRAINTS
+    for i in range(data.c_size):
+        last = data.get_citizen_num_tasks(i) - 1
+        if last >= 0:
+            model.addConstr(max_tf >= start_t[i, last] + data.get_d(i, last))
+    # order of tasks
+    for i in range(data.c_size):
+        for k in range(1, data.get_citizen_num_tasks(i)):
+            model.addConstr(start_t[i, k] >= start_t[i, k - 1] + data.get_d(i, k - 1),
+                            name=f'[{i},{k}] after [{i},{k - 1}]')
+    # same bureaucrat can not work on several tasks at once
+    for i, k, j, z in pairs:
+        model.addConstr(start_t[i, k] + data.get_d(i, k) <= start_t[j, z] +
+                        (M - tails[i, k] - heads[j, z]) * bur_busy[i, k, j, z])
+        model.addConstr(start_t[j, z] + data.get_d(j, z) <= start_t[i, k] +
+                        (M - tails[j, z] - heads[i, k]) * (1 - bur_busy[i, k, j, z]))
+    return start_t, max_tf, bur_busy, pairs
+
+
+def main():
+    args = parse_args()
+    input_file_path, output_file_path = args.input_file_path, args.output_file_path
+    data = read_data(input_file_path, args.cache)
+    schedule = None
+    if args.heuristic or not args.no_mip_start:
+        schedule = scheduling.solve(data, args.tabu_iterations, args.tabu_time)
+    if args.heuristic:
+        save_solution(output_file_path, schedule[1], data, schedule[0])
+        return
+    # every schedule of the heuristic makespan fits into [0, M], which also bounds the disjunctions
+    M = data.M if schedule is None else schedule[0]
+    model = milpmodel.create_model(args.solver)
+    if args.formulation == 'reduced':
+        start_t, max_tf, bur_busy, pairs = build_reduced_model(model, data, M)
+    else:
+        start_t, max_tf, bur_busy, pairs = build_ordered_model(model, data, M)
+    if schedule is not None:
+        max_tf.Start = schedule[0]
+        for i, k in data.list_of_tasks:
+            start_t[i, k].Start = schedule[1][i, k]
+        for i, k, j, z in pairs:
+            bur_busy[i, k, j, z].Start = int(schedule[1][i, k] > schedule[1][j, z])
     model.optimize()
 
-    save_solution(output_file_path, start_t, data, int(max_tf.x))
+    save_solution(output_file_path, {t: start_t[t].x for t in data.list_of_tasks}, data, int(max_tf.x))
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Heuristic scheduling engine of the bureaucrat job-shop, the citizens are the jobs and the bureaucrats the machines.
+Priority rule list scheduling builds active schedules, a tabu search over swaps of adjacent tasks at the ends of the
+critical blocks (the N5 neighbourhood of Nowicki and Smutnicki) improves the best of them. The makespan is a MIP start
+and an upper bound of the MIP, or the result on its own for instances too big for the MIP.
+A schedule is the sequence of the tasks of every bureaucrat, tasks are numbered citizen by citizen.
+"""
+import random
+import time
+from typing import Dict, List, Tuple
+
+
+class Tasks:
+    def __init__(self, data):
+        """
+        :param data: main.InputData
+        """
+        self.citizen_tasks: List[Tuple[int, int]] = [(i, k) for i in range(data.c_size)
+                                                     for k in range(data.get_citizen_num_tasks(i))]
+        self.index = {task: t for t, task in enumerate(self.citizen_tasks)}
+        self.durations = [data.get_d(i, k) for i, k in self.citizen_tasks]
+        self.bureaucrat = [0] * len(self.citizen_tasks)
+        for b in range(data.b_size):
+            for task in data.get_bur_tasks(b):
+                self.bureaucrat[self.index[task]] = b
+        self.b_size = data.b_size
+        # the previous task of the same citizen, -1 for the first one
+        self.citizen_pred = [t - 1 if k > 0 else -1 for t, (_, k) in enumerate(self.citizen_tasks)]
+        # remaining work of the citizen from the task on
+        self.remaining = self.durations[:]
+        for t in reversed(range(len(self.citizen_tasks) - 1)):
+            if self.citizen_pred[t + 1] == t:
+                self.remaining[t] += self.remaining[t + 1]
+
+    def __len__(self):
+        return len(self.citizen_tasks)
+
+
+def evaluate(tasks: Tasks, sequences: List[List[int]]):
+    """
+    Longest paths of the disjunctive graph given by the sequences
+    :return: start times and the predecessor which determines every start (-1 if it starts at 0), None if the
+             sequences contain a cycle
+    """
+    machine_pred = [-1] * len(tasks)
+    for sequence in sequences:
+        for a, b in zip(sequence, sequence[1:]):
+            machine_pred[b] = a
+    num_preds = [(tasks.citizen_pred[t] >= 0) + (machine_pred[t] >= 0) for t in range(len(tasks))]
+    machine_succ = [-1] * len(tasks)
+    for t, p in enumerate(machine_pred):
+        if p >= 0:
+            machine_succ[p] = t
+
+    start, critical = [0] * len(tasks), [-1] * len(tasks)
+    queue = [t for t in range(len(tasks)) if num_preds[t] == 0]
+    for t in queue:
+        end = start[t] + tasks.durations[t]
+        citizen_succ = t + 1 if t + 1 < len(tasks) and tasks.citizen_pred[t + 1] == t else -1
+        for s in (citizen_succ, machine_succ[t]):
+            if s < 0:
+                continue
+            if end >= start[s]:
+                start[s], critical[s] = end, t
+            num_preds[s] -= 1
+            if num_preds[s] == 0:
+                queue.append(s)
+    if len(queue) < len(tasks):
+        return None
+    return start, critical
+
+
+def makespan(tasks: Tasks, start: List[int]) -> int:
+    return max([s + d for s, d in zip(start, tasks.durations)], default=0)
+
+
+def critical_blocks(tasks: Tasks, start: List[int], critical: List[int]) -> List[List[int]]:
+    """
+    :return: maximal runs of tasks of one bureaucrat on a critical path, in path order
+    """
+    t = max(range(len(tasks)), key=lambda s: start[s] + tasks.durations[s])
+    path = [t]
+    while critical[t] >= 0:
+        t = critical[t]
+        path.append(t)
+    path.reverse()
+    blocks = [[path[0]]]
+    for a, b in zip(path, path[1:]):
+        if tasks.bureaucrat[a] == tasks.bureaucrat[b] and tasks.citizen_pred[b] != a:
+            blocks[-1].append(b)
+        else:
+            blocks.append([b])
+    return blocks
+
+
+PRIORITY_RULES = {
+    'mwkr': lambda tasks, t, est: (-tasks.remaining[t], est),
+    'spt': lambda tasks, t, est: (tasks.durations[t], est),
+    'lpt': lambda tasks, t, est: (-tasks.durations[t], est),
+    'est': lambda tasks, t, est: (est, -tasks.remaining[t]),
+}
+
+
+def list_schedule(tasks: Tasks, rule='mwkr') -> List[List[int]]:
+    """
+    Giffler-Thompson active schedule, the rule picks among the tasks competing for the bureaucrat of the earliest
+    completion
+    """
+    priority = PRIORITY_RULES[rule]
+    firsts = [t for t in range(len(tasks)) if tasks.citizen_pred[t] < 0]
+    citizen_ready = {t: 0 for t in firsts}
+    bureaucrat_ready = [0] * tasks.b_size
+    sequences = [[] for _ in range(tasks.b_size)]
+    while citizen_ready:
+        est = {t: max(r, bureaucrat_ready[tasks.bureaucrat[t]]) for t, r in citizen_ready.items()}
+        first = min(est, key=lambda t: (est[t] + tasks.durations[t], t))
+        b = tasks.bureaucrat[first]
+        conflict = [t for t in est if tasks.bureaucrat[t] == b and est[t] < est[first] + tasks.durations[first]]
+        t = min(conflict, key=lambda s: (priority(tasks, s, est[s]), s))
+        end = est[t] + tasks.durations[t]
+        sequences[b].append(t)
+        bureaucrat_ready[b] = end
+        del citizen_ready[t]
+        if t + 1 < len(tasks) and tasks.citizen_pred[t + 1] == t:
+            citizen_ready[t + 1] = end
+    return sequences
+
+
+def tabu_search(tasks: Tasks, sequences: List[List[int]], iterations=2000, tenure=8, time_limit=None,
+                seed=0) -> List[List[int]]:
+    """
+    Swaps the first and the last two tasks of the critical blocks, a swapped pair may not be swapped back for tenure
+    iterations unless that gives a new best schedule
+    :return: the best sequences found
+    """
+    rnd = random.Random(seed)
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    current = [s[:] for s in sequences]
+    start, critical = evaluate(tasks, current)
+    best, best_makespan = [s[:] for s in current], makespan(tasks, start)
+    tabu: Dict[Tuple[int, int], int] = {}
+    for it in range(iterations):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        blocks = critical_blocks(tasks, start, critical)
+        moves = set()
+        for n, block in enumerate(blocks):
+            if len(block) < 2:
+                continue
+            if n > 0:
+                moves.add((block[0], block[1]))
+            if n < len(blocks) - 1:
+                moves.add((block[-2], block[-1]))
+        if not moves:
+            # a single block, the makespan is the load of one bureaucrat
+            break
+
+        candidates = []
+        for a, b in sorted(moves):
+            sequence = current[tasks.bureaucrat[a]]
+            pos = sequence.index(a)
+            sequence[pos], sequence[pos + 1] = b, a
+            result = evaluate(tasks, current)
+            sequence[pos], sequence[pos + 1] = a, b
+            if result is not None:
+                candidates.append((makespan(tasks, result[0]), rnd.random(), a, b, result))
+        allowed = [c for c in candidates if tabu.get((c[2], c[3]), -1) < it or c[0] < best_makespan]
+        if not allowed:
+            if not candidates:
+                break
+            allowed = [min(candidates, key=lambda c: tabu[(c[2], c[3])])]
+        value, _, a, b, (start, critical) = min(allowed, key=lambda c: (c[0], c[1]))
+        sequence = current[tasks.bureaucrat[a]]
+        pos = sequence.index(a)
+        sequence[pos], sequence[pos + 1] = b, a
+        tabu[(b, a)] = it + tenure
+        if value < best_makespan:
+            best, best_makespan = [s[:] for s in current], value
+    return best
+
+
+def solve(data, iterations=2000, time_limit=None) -> Tuple[int, Dict[Tuple[int, int], int]]:
+    """
+    Best list schedule of all priority rules improved by the tabu search
+    :param data: main.InputData
+    :param time_limit: seconds of the tabu search
+    :return: makespan and the start time of every task (citizen, order)
+    """
+    tasks = Tasks(data)
+    if len(tasks) == 0:
+        return 0, {}
+    initial = min([list_schedule(tasks, rule) for rule in PRIORITY_RULES],
+                  key=lambda s: makespan(tasks, evaluate(tasks, s)[0]))
+    sequences = tabu_search(tasks, initial, iterations, time_limit=time_limit)
+    start, _ = evaluate(tasks, sequences)
+    return makespan(tasks, start), {task: start[t] for t, task in enumerate(tasks.citizen_tasks)}
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Checks compute_distances against the pair by pair oracle compute_distances_slow for all seam metrics, on the given
+instances and on random stripes, also with tiny tiles.
+usage: check_distances.py [instance ...] [--random 5] [--seed 0]
+"""
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from main import SEAM_METRICS, compute_distances, compute_distances_slow, read_input
+
+
+def check(stripes: np.ndarray, name):
+    for metric in SEAM_METRICS:
+        expected = compute_distances_slow(stripes, metric)
+        for max_tile_bytes in (1, 1 << 12, 1 << 26):
+            distances = compute_distances(stripes, metric, max_tile_bytes)
+            if distances[0].any() or distances[:, 0].any() or \
+                    not np.allclose(distances[1:, 1:], expected, rtol=1e-5):
+                raise AssertionError(f'{name}: {metric} distances differ with max_tile_bytes={max_tile_bytes}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('instances', nargs='*')
+    parser.add_argument('--random', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    instances = args.instances or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                'data/hw4_public_instances/public/instances/*.txt')))
+    for path in instances:
+        check(read_input(path), path)
+    rnd = np.random.default_rng(args.seed)
+    for i in range(args.random):
+        n, h = rnd.integers(1, 30), rnd.integers(1, 50)
+        check(rnd.integers(0, 256, size=(n, h, 2, 3)).astype(np.float64), f'random integral stripes {i}')
+        check(rnd.random(size=(n, h, 2, 3)) * 255, f'random float stripes {i}')
+    print(f'{len(instances) + 2 * args.random} instances, compute_distances matches the oracle')
+
+
+if __name__ == '__main__':
+    main()
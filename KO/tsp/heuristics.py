@@ -0,0 +1,151 @@
+"""
+Construction and local search heuristics for the asymmetric stripe TSP, used as a MIP start of main or on their own
+when no solver is available. A tour is an array of all nodes starting with the dummy node 0, the arc back to 0 is
+implicit.
+"""
+from typing import Dict
+
+import numpy as np
+
+EPS = 1e-9
+
+
+def tour_cost(dist: np.ndarray, tour: np.ndarray) -> float:
+    return float(dist[tour, np.roll(tour, -1)].sum())
+
+
+def tour_to_permutations(tour: np.ndarray) -> Dict[int, int]:
+    """
+    :return: the stripes of the tour by position from 1, as returned by main.get_permutations
+    """
+    return {k: int(tour[k]) for k in range(1, len(tour))}
+
+
+def nearest_neighbour(dist: np.ndarray, start=0) -> np.ndarray:
+    num_nodes = dist.shape[0]
+    visited = np.zeros(num_nodes, dtype=bool)
+    tour = np.empty(num_nodes, dtype=np.int64)
+    tour[0] = node = start
+    visited[start] = True
+    for k in range(1, num_nodes):
+        node = int(np.argmin(np.where(visited, np.inf, dist[node])))
+        tour[k] = node
+        visited[node] = True
+    return np.roll(tour, -int(np.flatnonzero(tour == 0)[0]))
+
+
+def greedy_edge(dist: np.ndarray) -> np.ndarray:
+    """
+    Takes the arcs by increasing cost as long as every node keeps at most one successor and one predecessor and no
+    cycle is closed, the remaining path is closed at the end
+    """
+    num_nodes = dist.shape[0]
+    if num_nodes == 1:
+        return np.zeros(1, dtype=np.int64)
+    cost = dist.astype(np.float64)
+    np.fill_diagonal(cost, np.inf)
+    succ, pred = [-1] * num_nodes, [-1] * num_nodes
+    fragment = list(range(num_nodes))
+
+    def find(v):
+        while fragment[v] != v:
+            fragment[v] = fragment[fragment[v]]
+            v = fragment[v]
+        return v
+
+    added = 0
+    for arc in np.argsort(cost, axis=None, kind='stable').tolist():
+        i, j = divmod(arc, num_nodes)
+        if succ[i] >= 0 or pred[j] >= 0 or i == j:
+            continue
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            continue
+        succ[i], pred[j] = j, i
+        fragment[root_i] = root_j
+        added += 1
+        if added == num_nodes - 1:
+            break
+    succ[succ.index(-1)] = pred.index(-1)
+
+    tour = np.empty(num_nodes, dtype=np.int64)
+    node = 0
+    for k in range(num_nodes):
+        tour[k] = node
+        node = succ[node]
+    return tour
+
+
+def _two_opt_move(dist: np.ndarray, tour: np.ndarray) -> bool:
+    """
+    Applies the best segment reversal tour[i:j + 1] for the first i which improves the tour, the reversed segment is
+    priced in the opposite direction as the distances are asymmetric
+    """
+    n = len(tour) - 1
+    ext = np.append(tour, 0)
+    fwd = np.concatenate(([0.0], np.cumsum(dist[ext[:-1], ext[1:]])))
+    bwd = np.concatenate(([0.0], np.cumsum(dist[ext[1:], ext[:-1]])))
+    for i in range(1, n):
+        js = np.arange(i + 1, n + 1)
+        a, t_i, t_j, b = ext[i - 1], ext[i], ext[js], ext[js + 1]
+        delta = dist[a, t_j] + dist[t_i, b] - dist[a, t_i] - dist[t_j, b] + \
+            (bwd[js] - bwd[i]) - (fwd[js] - fwd[i])
+        best = int(np.argmin(delta))
+        if delta[best] < -EPS:
+            j = int(js[best])
+            tour[i:j + 1] = tour[i:j + 1][::-1].copy()
+            return True
+    return False
+
+
+def _or_opt_move(dist: np.ndarray, tour: np.ndarray, max_length=3) -> bool:
+    """
+    Applies the best move of a segment of at most max_length stripes to another position, without reversing it
+    """
+    n = len(tour) - 1
+    ext = np.append(tour, 0)
+    gap = dist[ext[:-1], ext[1:]]
+    for length in range(1, max_length + 1):
+        for i in range(1, n - length + 2):
+            last = i + length - 1
+            p, s_first, s_last, q = ext[i - 1], ext[i], ext[last], ext[last + 1]
+            gain = dist[p, s_first] + dist[s_last, q] - dist[p, q]
+            delta = dist[ext[:-1], s_first] + dist[s_last, ext[1:]] - gap - gain
+            # arcs touching the segment are no insertion points
+            delta[i - 1:last + 1] = np.inf
+            k = int(np.argmin(delta))
+            if delta[k] < -EPS:
+                segment = tour[i:last + 1].copy()
+                rest = np.concatenate((tour[:i], tour[last + 1:]))
+                at = k + 1 if k < i else k + 1 - length
+                tour[:] = np.concatenate((rest[:at], segment, rest[at:]))
+                return True
+    return False
+
+
+def local_search(dist: np.ndarray, tour: np.ndarray, max_moves=None) -> np.ndarray:
+    """
+    2-opt and Or-opt moves until neither improves the tour
+    :param max_moves: stop after that many improving moves
+    """
+    tour = tour.copy()
+    moves = 0
+    while max_moves is None or moves < max_moves:
+        if not (_or_opt_move(dist, tour) or _two_opt_move(dist, tour)):
+            break
+        moves += 1
+    return tour
+
+
+CONSTRUCTIONS = {
+    'nearest-neighbour': nearest_neighbour,
+    'greedy-edge': greedy_edge,
+}
+
+
+def heuristic_tour(dist: np.ndarray, constructions=tuple(CONSTRUCTIONS.keys()), max_moves=None) -> np.ndarray:
+    """
+    :return: the cheapest of the locally optimised tours of every construction
+    """
+    tours = [local_search(dist, CONSTRUCTIONS[c](dist), max_moves) for c in constructions]
+    return min(tours, key=lambda t: tour_cost(dist, t))
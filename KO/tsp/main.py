@@ -1,41 +1,105 @@
 #!/usr/bin/env python3
+import argparse
+import os
 import sys
 
-import gurobipy as grb
 import numpy as np
-import subtourelim
 
+import heuristics
+import subtourelim
 
-def read_input(path):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+import instancecache  # noqa: E402
+import milpmodel  # noqa: E402
+
+
+def read_input(path, use_cache=False):
+    """
+    :param path: text instance, or a .npy file of the full pixel data written by convert_to_raw, which is
+                 memory-mapped so only the border columns are read
+    :param use_cache: keep the stripes in the instancecache, later runs on the same file memory-map them
+    :return: stripes[n, h, 2, c], the first and the last pixel column of every stripe
+    """
+    if use_cache:
+        return instancecache.load(path, 'stripes-1', lambda p: {'stripes': read_input(p)})['stripes']
+    pixels = read_pixels(path)
+    return pixels[:, :, [0, -1], :].astype(np.float64)
+
+
+def read_pixels(path) -> np.ndarray:
+    """
+    :return: pixels[n, h, w, c] of all stripes, memory-mapped for .npy files
+    """
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
     with open(path, 'r') as f:
         n, w, h = [int(x) for x in f.readline().split()]
         c = 3
-        stripes = np.zeros((n, h, 2, c))
-        for stripe_num in range(n):
-            stripe = [int(x) for x in f.readline().split()]
-            for stripe_row in range(h):
-                row = stripe[stripe_row * (w * c):(stripe_row * (w * c) + (w * c))]
-                for stripe_col in range(2):
-                    col = row[stripe_col * (w - 1) * c:stripe_col * (w - 1) * c + c]
-                    for channel in range(c):
-                        stripes[stripe_num, stripe_row, stripe_col, channel] = col[channel]
-    return stripes
-
-
-def compute_distances(stripes: np.ndarray):
-    left_border = stripes[:, :, 0, :]
-    right_border = stripes[:, :, 1, :]
-    distances = np.zeros((stripes.shape[0] + 1, stripes.shape[0] + 1))
-    tmp_dst = np.sum(np.sum(np.abs(right_border[:, np.newaxis, :] - left_border), axis=-1), axis=-1)
-    distances[1:distances.shape[0] + 1, 1:distances.shape[1] + 1] = tmp_dst[:]
+        values = np.fromstring(f.read(), dtype=np.int64, sep=' ')
+    if values.shape[0] != n * h * w * c:
+        raise ValueError(f'{path} should contain {n * h * w * c} pixel values, found {values.shape[0]}')
+    return values.reshape(n, h, w, c)
+
+
+def convert_to_raw(in_path, out_path):
+    """
+    Stores the pixels of a text instance as a .npy file for read_input
+    """
+    pixels = read_pixels(in_path)
+    dtype = np.uint8 if pixels.size == 0 or (pixels.min() >= 0 and pixels.max() <= 255) else np.int32
+    np.save(out_path, pixels.astype(dtype))
+
+
+SEAM_METRICS = ('l1', 'l2', 'sq')
+
+
+def compute_distances(stripes: np.ndarray, metric='l1', max_tile_bytes=1 << 26):
+    """
+    Seam costs of placing stripe j right of stripe i, node 0 is the dummy start with zero costs.
+    The stripe pairs are processed in tiles, so the temporary differences never exceed max_tile_bytes. Integral pixels
+    are accumulated in int32 (int64 for squares), other values in float32.
+    :param metric: 'l1' sum of absolute differences, 'l2' euclidean norm, 'sq' sum of squared differences
+    :return: (n + 1) x (n + 1) matrix
+    """
+    if metric not in SEAM_METRICS:
+        raise ValueError(f'Unknown seam metric: {metric}')
+    n = stripes.shape[0]
+    integral = np.array_equal(stripes, np.round(stripes))
+    dtype = np.int32 if integral else np.float32
+    left_border = stripes[:, :, 0, :].reshape(n, -1).astype(dtype)
+    right_border = stripes[:, :, 1, :].reshape(n, -1).astype(dtype)
+    acc_dtype = np.int64 if integral and metric != 'l1' else dtype
+    block = max(1, int(np.sqrt(max_tile_bytes / max(1, left_border.shape[1] * left_border.itemsize))))
+
+    distances = np.zeros((n + 1, n + 1))
+    for i in range(0, n, block):
+        for j in range(0, n, block):
+            diff = right_border[i:i + block, np.newaxis, :] - left_border[np.newaxis, j:j + block, :]
+            if metric == 'l1':
+                np.abs(diff, out=diff)
+                tile = diff.sum(axis=-1, dtype=acc_dtype)
+            else:
+                tile = np.einsum('ijk,ijk->ij', diff, diff, dtype=acc_dtype)
+                if metric == 'l2':
+                    tile = np.sqrt(tile)
+            distances[i + 1:i + 1 + block, j + 1:j + 1 + block] = tile
     return distances
 
 
-def compute_distances_slow(stripes: np.ndarray):
+def compute_distances_slow(stripes: np.ndarray, metric='l1'):
+    """
+    Pair by pair reference of compute_distances (without the dummy node), only used as a test oracle
+    """
     dist = np.zeros((stripes.shape[0], stripes.shape[0]))
     for i in range(stripes.shape[0]):
         for j in range(stripes.shape[0]):
-            dist[i, j] = np.sum(np.sum(np.abs(stripes[i, :, 1, :] - stripes[j, :, 0, :]), axis=1))
+            diff = stripes[i, :, 1, :] - stripes[j, :, 0, :]
+            if metric == 'l1':
+                dist[i, j] = np.sum(np.sum(np.abs(diff), axis=1))
+            elif metric == 'sq':
+                dist[i, j] = np.sum(diff ** 2)
+            else:
+                dist[i, j] = np.sqrt(np.sum(diff ** 2))
     return dist
 
 
@@ -47,7 +111,7 @@ def save_output(path, permutations):
         f.write(' '.join(solution))
 
 
-def get_permutations(var: grb.tupledict):
+def get_permutations(var: dict):
     adj_list = {}
     for i, j in var.keys():
         if var[i, j].x > 0.5:
@@ -67,24 +131,51 @@ def get_permutations(var: grb.tupledict):
     return permutations
 
 
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input_file')
+    parser.add_argument('output_file')
+    parser.add_argument('--cache', action='store_true',
+                        help='keep the parsed input in the instance cache ($KO_CACHE_DIR)')
+    parser.add_argument('--metric', choices=SEAM_METRICS, default='l1', help='seam cost between neighbouring stripes')
+    parser.add_argument('--heuristic', action='store_true',
+                        help='save the heuristic tour without solving the MIP, works without gurobi')
+    parser.add_argument('--no-mip-start', action='store_true', help='do not start the MIP from the heuristic tour')
+    parser.add_argument('--no-user-cuts', action='store_true',
+                        help='cut subtours only from integer solutions, not from the LP relaxations of the nodes')
+    parser.add_argument('--solver', choices=milpmodel.BACKENDS, default='gurobi',
+                        help='MILP backend, highs adds the subtour constraints by solving again and has no user cuts')
+    return parser.parse_args()
+
+
 def main():
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-    stripes = read_input(input_file)
-    tmp_dst = compute_distances_slow(stripes)
-    distances = compute_distances(stripes)
-    model = grb.Model()
-    model.Params.lazyConstraints = 1
+    args = parse_args()
+    input_file, output_file = args.input_file, args.output_file
+    stripes = read_input(input_file, args.cache)
+    distances = compute_distances(stripes, args.metric)
+    tour = heuristics.heuristic_tour(distances) if args.heuristic or not args.no_mip_start else None
+    if args.heuristic:
+        save_output(output_file, heuristics.tour_to_permutations(tour))
+        return
+    model = milpmodel.create_model(args.solver)
     model._num_nodes = stripes.shape[0] + 1
     indices = [(i, j) for i in range(model._num_nodes) for j in range(model._num_nodes) if i != j]
-    x_vars: grb.tupledict = model.addVars(indices, vtype=grb.GRB.BINARY, name='x')
+    x_vars = model.addVars(indices, vtype=milpmodel.BINARY, name='x')
     model._x = x_vars
     model._dists = distances
+    model._user_cuts = not args.no_user_cuts and args.solver == 'gurobi'
+    model._arcs = np.array(indices)
+    model._vars = [x_vars[i, j] for i, j in indices]
 
     model.addConstrs((x_vars.sum(i, '*') == 1 for i in range(model._num_nodes)), name='out-deg')
     model.addConstrs((x_vars.sum('*', j) == 1 for j in range(model._num_nodes)), name='in-deg')
 
-    model.setObjective(grb.quicksum([x_vars[i, j] * distances[i, j] for i, j in indices]), grb.GRB.MINIMIZE)
+    model.setObjective(model.quicksum([x_vars[i, j] * distances[i, j] for i, j in indices]), milpmodel.MINIMIZE)
+    if tour is not None:
+        for i, j in indices:
+            x_vars[i, j].Start = 0
+        for i, j in zip(tour, np.roll(tour, -1)):
+            x_vars[int(i), int(j)].Start = 1
     model.optimize(subtourelim.tsp_callback)
     perms = get_permutations(x_vars)
     save_output(output_file, perms)
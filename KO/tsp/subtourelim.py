@@ -1,50 +1,116 @@
+import os
+import sys
 from typing import List, Dict
 
-import gurobipy as grb
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+import milpmodel  # noqa: E402
 
-def tsp_callback(model: grb.Model, where):
-    if where == grb.GRB.Callback.MIPSOL:
+# LP values below are treated as zero, cuts must be violated by more
+EPS = 1e-6
+
+
+def tsp_callback(model: milpmodel.Model, where):
+    if where == milpmodel.MIPSOL:
         x = model._x
-        sub_tours = find_sub_tours(x, model)
+        sub_tours = find_sub_tours(model)
         if len(sub_tours) > 1:
-            min_set = sub_tours[np.argmin([s['cost'] for s in sub_tours])]['path']
-            model.cbLazy(grb.quicksum([x[i, j] for i, j in min_set if i != j]) <= (len(min_set) - 1))
-
-
-def find_sub_tours(var: grb.tupledict, model: grb.Model) -> List[Dict]:
-    adj_list = build_adj_list(var, model)
-    visited = [False] * model._num_nodes
-    sub_tours_list = []
-    for i in range(model._num_nodes):
-        if not visited[i]:
-            visited[i] = True
-            edge_set = graph_traversal(adj_list, i, visited, model._dists)
-            sub_tours_list.append(edge_set)
-    return sub_tours_list
-
-
-def graph_traversal(adj_list: dict, start_v: int, visited, cost: np.ndarray) -> dict:
-    edges = {'path': [], 'cost': 0}
-    next_node = adj_list[start_v]
-    edges['path'].append((start_v, next_node))
-    edges['cost'] += cost[start_v, next_node]
-    visited[next_node] = True
-    while True:
-        dst_node = adj_list[next_node]
-        edges['path'].append((next_node, dst_node))
-        edges['cost'] += cost[next_node, dst_node]
-        next_node = dst_node
-        visited[next_node] = True
-        if next_node == start_v:
-            break
-    return edges
-
-
-def build_adj_list(var: grb.tupledict, model: grb.Model) -> dict:
-    adj_dict = {}
-    for i, j in var.keys():
-        if model.cbGetSolution(var[i, j]) > 0.5:
-            adj_dict[i] = j
-    return adj_dict
+            for nodes in sub_tours:
+                model.cbLazy(model.quicksum([x[i, j] for i in nodes for j in nodes if i != j]) <= len(nodes) - 1)
+    elif where == milpmodel.MIPNODE and model._user_cuts:
+        x = model._x
+        relaxation = np.zeros((model._num_nodes, model._num_nodes))
+        relaxation[model._arcs[:, 0], model._arcs[:, 1]] = model.cbGetNodeRel(model._vars)
+        for nodes in fractional_sub_tours(relaxation):
+            model.cbCut(model.quicksum([x[i, j] for i in nodes for j in nodes if i != j]) <= len(nodes) - 1)
+
+
+def fractional_sub_tours(relaxation: np.ndarray) -> List[np.ndarray]:
+    """
+    Separates the subtour constraints violated by a fractional solution. A max-flow from node 0 to every other node
+    on the support graph finds the sets S which less than one unit enters, by the in-degree constraints their inner
+    arcs then carry more than |S| - 1. Nodes already in a violated set are not used as a sink again.
+    :param relaxation: LP value of every arc
+    :return: node sets of the violated constraints
+    """
+    num_nodes = relaxation.shape[0]
+    support = [dict() for _ in range(num_nodes)]
+    for i, j in zip(*np.nonzero(relaxation > EPS)):
+        support[i][j] = relaxation[i, j]
+        support[j].setdefault(i, 0.0)
+
+    sub_tours = []
+    covered = np.zeros(num_nodes, dtype=bool)
+    for sink in range(1, num_nodes):
+        if covered[sink]:
+            continue
+        reachable = _source_side_of_cut(support, 0, sink, 1 - EPS)
+        if reachable is None:
+            continue
+        nodes = np.flatnonzero(~reachable)
+        if relaxation[np.ix_(nodes, nodes)].sum() > len(nodes) - 1 + EPS:
+            sub_tours.append(nodes)
+            covered[nodes] = True
+    return sub_tours
+
+
+def _source_side_of_cut(capacity: List[Dict[int, float]], source, sink, limit):
+    """
+    Augments shortest paths until the flow reaches limit
+    :return: mask of the nodes reachable from source in the residual graph of a cut below limit, None if there is
+             no such cut
+    """
+    residual = [dict(arcs) for arcs in capacity]
+    flow = 0.0
+    while flow < limit:
+        parent = {source: source}
+        queue = [source]
+        for u in queue:
+            for v, cap in residual[u].items():
+                if cap > EPS and v not in parent:
+                    parent[v] = u
+                    queue.append(v)
+            if sink in parent:
+                break
+        if sink not in parent:
+            reachable = np.zeros(len(capacity), dtype=bool)
+            reachable[list(parent.keys())] = True
+            return reachable
+        path = []
+        v = sink
+        while v != source:
+            path.append((parent[v], v))
+            v = parent[v]
+        bottleneck = min([residual[u][v] for u, v in path])
+        for u, v in path:
+            residual[u][v] -= bottleneck
+            residual[v][u] += bottleneck
+        flow += bottleneck
+    return None
+
+
+def find_sub_tours(model: milpmodel.Model) -> List[np.ndarray]:
+    """
+    Reads the incumbent with a single cbGetSolution call
+    :return: nodes of every cycle of the solution
+    """
+    solution = np.zeros((model._num_nodes, model._num_nodes))
+    solution[model._arcs[:, 0], model._arcs[:, 1]] = model.cbGetSolution(model._vars)
+    return successor_cycles(np.argmax(solution, axis=1))
+
+
+def successor_cycles(successors: np.ndarray) -> List[np.ndarray]:
+    """
+    Labels every node with the smallest node of its cycle by pointer jumping, the union-find of the cycles is
+    resolved in log(n) array steps
+    :param successors: successor of every node, a permutation
+    :return: nodes of every cycle, the cycles ordered by their smallest node
+    """
+    label = np.arange(successors.shape[0])
+    jump = successors.copy()
+    for _ in range(max(1, int(np.ceil(np.log2(successors.shape[0]))))):
+        label = np.minimum(label, label[jump])
+        jump = jump[jump]
+    order = np.argsort(label, kind='stable')
+    return np.split(order, np.flatnonzero(np.diff(label[order])) + 1)